@@ -0,0 +1,64 @@
+"""Стоимость отрисовки статичных экранов: сборка заново против кэша.
+
+Для каждого экрана из screens.py и клавиатуры из keyboards.py, которые
+обслуживает utils/render_cache.py, меряется время одной сборки
+(исходная функция, как до кэша) и одного обращения через кэш. Тексты из
+одних литералов Python склеивает ещё при компиляции - для них выигрыш
+только в клавиатуре, которую экран отдаёт вместе с текстом.
+
+    python benchmarks/bench_screens.py --number 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from keyboards import kb
+from screens import screens
+
+# (название, функция, аргументы)
+SCREENS = [
+    ('main_menu', kb.main_menu, (False,)),
+    ('main_menu(admin)', kb.main_menu, (True,)),
+    ('back_button', kb.back_button, ()),
+    ('cancel_button', kb.cancel_button, ()),
+    ('tariff_selection', kb.tariff_selection, ()),
+    ('budget_selection', kb.budget_selection, ()),
+    ('admin_panel', kb.admin_panel, ()),
+    ('tariffs', screens.tariffs, ()),
+    ('about', screens.about, ()),
+    ('support', screens.support, ()),
+    ('portfolio', screens.portfolio, ()),
+    ('order_start', screens.order_start, ()),
+    ('help', screens.help, ()),
+]
+
+def measure(func, args, number: int, repeat: int) -> float:
+    """Лучшее время одного вызова, мкс"""
+    best = min(timeit.repeat(lambda: func(*args), number=number, repeat=repeat))
+    return best / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='вызовов в замере')
+    parser.add_argument('--repeat', type=int, default=5, help='замеров, берётся лучший')
+    args = parser.parse_args()
+    
+    print(f"{'экран':<18} {'сборка, мкс':>12} {'кэш, мкс':>10} {'ускорение':>10}")
+    total_build = total_cached = 0.0
+    
+    for name, func, func_args in SCREENS:
+        build = measure(func.__wrapped__, func_args, args.number, args.repeat)
+        cached = measure(func, func_args, args.number, args.repeat)
+        total_build += build
+        total_cached += cached
+        print(f"{name:<18} {build:>12.2f} {cached:>10.2f} {build / cached:>9.1f}x")
+    
+    print(f"{'всего':<18} {total_build:>12.2f} {total_cached:>10.2f} "
+          f"{total_build / total_cached:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Пропускная способность многопроцессного режима в зависимости от числа процессов.
+
+Рабочие процессы - настоящее приложение (build_application) с ботом-заглушкой
+из tools/offline_bot.py, задержка Bot API имитируется (--latency). Обновления
+от --users пользователей раздаются по процессам так же, как в супервизоре.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --updates 2000 --latency 20
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+from workers import Supervisor
+
+# Экраны, которые не пишут в БД ничего, кроме активности
+CALLBACKS = ['tariffs', 'portfolio', 'about', 'start']
+
+def make_bot():
+    """Бот-заглушка для рабочего процесса (вызывается в дочернем процессе)"""
+    from offline_bot import OfflineBot
+    from telegram.warnings import PTBUserWarning
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    logging.getLogger().setLevel(logging.WARNING)
+    return OfflineBot('100000:OFFLINE')
+
+def make_updates(count: int, users: int) -> list:
+    """(user_id, JSON обновления): /start и переходы по меню по кругу"""
+    updates = []
+    for i in range(count):
+        user_id = 10_000 + i % users
+        sender = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        step = (i // users) % (len(CALLBACKS) + 1)
+        
+        if step == 0:
+            update = {'update_id': i + 1, 'message': {
+                'message_id': i + 1, 'date': int(time.time()), 'chat': chat,
+                'from': sender, 'text': '/start',
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]
+            }}
+        else:
+            update = {'update_id': i + 1, 'callback_query': {
+                'id': str(i + 1), 'from': sender, 'chat_instance': 'bench',
+                'data': CALLBACKS[step - 1],
+                'message': {
+                    'message_id': 1, 'date': int(time.time()), 'chat': chat,
+                    'from': {'id': 100000, 'is_bot': True, 'first_name': 'Offline'},
+                    'text': '...'
+                }
+            }}
+        updates.append((user_id, json.dumps(update)))
+    return updates
+
+def run(workers: int, updates: list) -> float:
+    """Обработать все обновления, вернуть время в секундах"""
+    supervisor = Supervisor(workers, bot_factory=make_bot)
+    supervisor.start()
+    
+    started = time.perf_counter()
+    for user_id, data in updates:
+        supervisor.dispatch_raw(user_id % workers, data)
+    # stop() дожидается, пока рабочие разберут свои очереди
+    supervisor.stop(timeout=600)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--latency', type=int, default=20, help='задержка Bot API, мс')
+    args = parser.parse_args()
+    
+    os.environ['OFFLINE_API_LATENCY_MS'] = str(args.latency)
+    os.environ['OFFLINE_BOT_VERBOSE'] = '0'
+    os.environ.setdefault('ADMIN_IDS', '1')
+    
+    updates = make_updates(args.updates, args.users)
+    print(
+        f"Обновлений: {args.updates}, пользователей: {args.users}, "
+        f"задержка API: {args.latency} мс, CPU: {os.cpu_count()}\n"
+    )
+    print(f"{'процессов':>10} {'время, с':>10} {'обн./с':>10} {'ускорение':>10}")
+    
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.environ['DATABASE_NAME'] = os.path.join(tmp, 'bench.db')
+            elapsed = run(workers, updates)
+            # Рабочие процессы должны писать во временную базу, а не в рабочую
+            with sqlite3.connect(path) as conn:
+                users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+            assert users == min(args.users, args.updates), f"в {path} пользователей: {users}"
+        
+        rate = args.updates / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>10} {elapsed:>10.2f} {rate:>10.0f} {rate / baseline:>9.2f}x")
+
+if __name__ == '__main__':
+    main()
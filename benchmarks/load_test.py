@@ -0,0 +1,250 @@
+"""Нагрузочный прогон всего стека обработчиков на синтетических пользователях.
+
+Приложение собирается так же, как в bot.main() (build_application), но с
+ботом-заглушкой: запросы к Bot API не уходят в сеть, а считаются по
+методам (задержку API можно имитировать --latency). --users пользователей,
+не более --concurrency одновременно, проходят сценарий: /start → тарифы →
+оформление заказа в пять шагов → сообщение менеджеру, после чего один из
+--admins администраторов открывает заказ и меняет его статус (смены
+статуса у одного администратора идут по очереди - диалог у него один).
+
+Обновления подаются прямо в Application.process_update, задержка - время
+обработки одного обновления всеми группами обработчиков. Отчёт: пропускная
+способность и p50/p95/p99 по обработчикам и по шаблонам callback_data
+(tariff_{tariff}, chat_order_{order}, ...).
+
+    python benchmarks/load_test.py --users 2000 --concurrency 200 --latency 20
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import logging
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+BOT_ID = 100000
+FIRST_USER_ID = 10_000
+
+# Шаги сценария: (обработчик, вид обновления, текст или callback_data).
+# В шаблонах подставляются user, tariff, budget и order
+CLIENT_SCRIPT = [
+    ('start', 'command', '/start'),
+    ('show_tariffs', 'callback', 'tariffs'),
+    ('start_order', 'callback', 'order'),
+    ('select_tariff', 'callback', 'tariff_{tariff}'),
+    ('enter_name', 'text', 'Пользователь {user}'),
+    ('enter_description', 'text', 'Нужен бот для приёма заявок с оплатой и админкой'),
+    ('select_budget', 'callback', 'budget_{budget}'),
+    ('enter_contact', 'text', '@user{user}'),
+    ('start_order_chat', 'callback', 'chat_order_{order}'),
+    ('process_user_reply', 'text', 'Подскажите, когда можно начать?'),
+]
+ADMIN_SCRIPT = [
+    ('admin_order_detail', 'callback', 'admin_order_{order}'),
+    ('admin_set_status', 'callback', 'setstatus_{order}_in_progress'),
+    ('admin_save_status', 'text', 'Взяли в работу'),
+]
+BUDGETS = ['1500', '2500', '5000', '5000plus', 'unknown']
+
+def percentile(values: list, p: float) -> float:
+    """Перцентиль по отсортированному списку (метод ближайшего ранга)"""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+class LoadTest:
+    """Прогон сценариев через приложение и сбор задержек"""
+    
+    def __init__(self, application, admins: list, concurrency: int):
+        self.application = application
+        self.admins = admins
+        self._admin_locks = {admin_id: asyncio.Lock() for admin_id in admins}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._ids = itertools.count(1)
+        self.by_handler = collections.defaultdict(list)
+        self.by_pattern = collections.defaultdict(list)
+        self.completed = 0
+        self.failed = 0
+    
+    def _update(self, user_id: int, kind: str, payload: str):
+        from telegram import Update
+        
+        sender = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        update_id = next(self._ids)
+        
+        if kind == 'callback':
+            data = {'update_id': update_id, 'callback_query': {
+                'id': str(update_id), 'from': sender, 'chat_instance': 'load',
+                'data': payload,
+                'message': {
+                    'message_id': 1, 'date': int(time.time()), 'chat': chat,
+                    'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'Offline'},
+                    'text': '...'
+                }
+            }}
+        else:
+            message = {
+                'message_id': update_id, 'date': int(time.time()), 'chat': chat,
+                'from': sender, 'text': payload
+            }
+            if kind == 'command':
+                message['entities'] = [
+                    {'type': 'bot_command', 'offset': 0, 'length': len(payload.split()[0])}
+                ]
+            data = {'update_id': update_id, 'message': message}
+        
+        return Update.de_json(data, self.application.bot)
+    
+    async def _step(self, user_id: int, step: tuple, values: dict):
+        handler, kind, template = step
+        payload = template.format(**values)
+        update = self._update(user_id, kind, payload)
+        
+        started = time.perf_counter()
+        await self.application.process_update(update)
+        elapsed = time.perf_counter() - started
+        
+        self.by_handler[handler].append(elapsed)
+        # Кнопки - по шаблону callback_data, команды - по команде
+        self.by_pattern['текст' if kind == 'text' else template].append(elapsed)
+    
+    async def run_user(self, index: int, tariffs: list):
+        from database import adb
+        
+        user_id = FIRST_USER_ID + index
+        values = {
+            'user': user_id,
+            'tariff': tariffs[index % len(tariffs)],
+            'budget': BUDGETS[index % len(BUDGETS)],
+            'order': None
+        }
+        
+        async with self._slots:
+            for step in CLIENT_SCRIPT:
+                if step[0] == 'start_order_chat':
+                    order = await adb.get_latest_user_order(user_id)
+                    if order is None:
+                        self.failed += 1
+                        return
+                    values['order'] = order['id']
+                await self._step(user_id, step, values)
+            
+            admin_id = self.admins[index % len(self.admins)]
+            await self._step(admin_id, ADMIN_SCRIPT[0], values)
+            # Диалог смены статуса у администратора один, поэтому смены
+            # статуса одного администратора идут по очереди
+            async with self._admin_locks[admin_id]:
+                for step in ADMIN_SCRIPT[1:]:
+                    await self._step(admin_id, step, values)
+        
+        self.completed += 1
+    
+    async def run(self, users: int, tariffs: list) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(self.run_user(index, tariffs) for index in range(users)))
+        return time.perf_counter() - started
+
+def make_bot():
+    """Бот-заглушка, считающий вызовы Bot API по методам"""
+    from offline_bot import OfflineBot
+    
+    class RecordingBot(OfflineBot):
+        calls = collections.Counter()
+        
+        async def _do_post(self, endpoint, data, *args, **kwargs):
+            self.calls[endpoint] += 1
+            return await super()._do_post(endpoint, data, *args, **kwargs)
+    
+    return RecordingBot(f'{BOT_ID}:OFFLINE')
+
+def print_table(title: str, samples: dict):
+    print(f"\n{title:<32} {'обн.':>7} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'макс, мс':>9}")
+    for name, values in sorted(samples.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        print(
+            f"{name:<32} {len(values):>7} "
+            f"{percentile(values, 50) * 1000:>9.2f} {percentile(values, 95) * 1000:>9.2f} "
+            f"{percentile(values, 99) * 1000:>9.2f} {values[-1] * 1000:>9.2f}"
+        )
+
+async def load(args) -> None:
+    import bot as bot_module
+    from config import TARIFFS
+    from database import db
+    
+    # Синтетические пользователи не должны попасть в рабочую базу
+    assert db.db_name == os.environ['DATABASE_NAME'], f"используется база {db.db_name}"
+    
+    logging.getLogger().setLevel(logging.WARNING)
+    application = bot_module.build_application(bot=make_bot())
+    
+    errors = collections.Counter()
+    
+    async def count_error(update, context):
+        errors[type(context.error).__name__] += 1
+    
+    application.add_error_handler(count_error)
+    
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    
+    test = LoadTest(application, args.admin_ids, args.concurrency)
+    try:
+        elapsed = await test.run(args.users, list(TARIFFS))
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await application.post_shutdown(application)
+    
+    total = sum(len(values) for values in test.by_handler.values())
+    print(
+        f"Пользователей: {args.users} (одновременно до {args.concurrency}), "
+        f"администраторов: {len(args.admin_ids)}, задержка API: {args.latency} мс\n"
+        f"Сценариев завершено: {test.completed}, прервано: {test.failed}\n"
+        f"Обновлений: {total} за {elapsed:.2f} с - {total / elapsed:.0f} обн./с"
+    )
+    if errors:
+        print("Ошибки обработчиков: " + ', '.join(f"{name} x{count}" for name, count in errors.items()))
+    
+    calls = application.bot.calls
+    print("Вызовы Bot API: " + ', '.join(f"{name} {count}" for name, count in calls.most_common()))
+    
+    print_table('обработчик', test.by_handler)
+    print_table('шаблон', test.by_pattern)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100, help='пользователей одновременно')
+    parser.add_argument('--admins', type=int, default=20)
+    parser.add_argument('--latency', type=int, default=0, help='задержка Bot API, мс')
+    args = parser.parse_args()
+    args.admin_ids = list(range(1, args.admins + 1))
+    
+    # До импорта config: переменные окружения важнее .env
+    os.environ['OFFLINE_API_LATENCY_MS'] = str(args.latency)
+    os.environ['OFFLINE_BOT_VERBOSE'] = '0'
+    os.environ['ADMIN_IDS'] = ','.join(map(str, args.admin_ids))
+    
+    from telegram.warnings import PTBUserWarning
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.environ['DATABASE_NAME'] = os.path.join(tmp, 'load.db')
+        asyncio.run(load(args))
+        with sqlite3.connect(path) as conn:
+            orders = conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+        assert orders == args.users, f"в {path} заказов: {orders}"
+
+if __name__ == '__main__':
+    main()
@@ -3,27 +3,39 @@
 
 import logging
 import sys
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import (
     Application,
     CommandHandler,
-    CallbackQueryHandler,
     MessageHandler,
     ConversationHandler,
+    TypeHandler,
     filters
 )
 from datetime import datetime
 
 # Импорты из проекта
-from config import BOT_TOKEN, ADMIN_IDS, ORDER_STATUSES, BUTTONS
-from database import db
+from config import (
+    BOT_TOKEN, ADMIN_IDS, ORDER_STATUSES, ACTIVITY_FLUSH_INTERVAL,
+    EVENTS_FLUSH_INTERVAL, OUTBOX_KEEP_DAYS, ARCHIVE_AFTER_DAYS, ERROR_WINDOW, ERROR_NOTIFY_INTERVAL, ERROR_DIGEST_INTERVAL,
+    BOT_MODE, BOT_WORKERS, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET
+)
+from database import adb
 from utils.decorators import admin_only, track_activity, error_handler, log_command
+from utils.notify import notifier
+from utils.outbox import outbox
+from utils.chat_digest import chat_digest
+from utils.broadcast import broadcaster
+from utils.errors import error_tracker
+from utils.helpers import escape_html
+from utils.router import CallbackRouter
 
 # Импорт обработчиков
 from handlers.user import (
     start, show_tariffs, show_my_orders, show_order_detail,
     show_about, show_support, show_reviews, show_portfolio,
-    process_user_reply, start_direct_chat, start_order_chat  # Добавлены новые функции для чата
+    process_user_reply, start_direct_chat, start_order_chat,  # Добавлены новые функции для чата
+    build_user_orders, page_info
 )
 from handlers.order import (
     start_order, select_tariff, enter_name, enter_description,
@@ -33,11 +45,15 @@ from handlers.order import (
 from handlers.admin import (
     admin_panel, admin_orders, admin_new_orders, admin_order_detail,
     admin_change_status_menu, admin_set_status, admin_save_status,
-    admin_order_history, admin_users, admin_stats,
+    admin_order_history, admin_users, admin_stats, admin_trends,
     admin_message_start, admin_send_message, show_order_chat,
+    broadcast_command, broadcast_confirm, broadcast_cancel,
+    find_command, find_page,
     ADMIN_COMMENT, ADMIN_MESSAGE
 )
 from keyboards import kb
+from screens import screens, warm_up
+from persistence import SQLitePersistence
 
 # Настройка логирования
 logging.basicConfig(
@@ -75,97 +91,124 @@ async def error_callback(update: object, context):
                     error_text,
                     parse_mode='HTML'
                 )
-            
-            # Уведомляем администраторов об ошибке
-            admin_error_text = (
-                f"🚨 <b>ОШИБКА В БОТЕ</b>\n\n"
-                f"<code>{str(context.error)[:500]}</code>"
-            )
-            
-            for admin_id in ADMIN_IDS:
-                try:
-                    await context.bot.send_message(
-                        chat_id=admin_id,
-                        text=admin_error_text,
-                        parse_mode='HTML'
-                    )
-                except:
-                    pass
+        
+        # Уведомляем администраторов - не чаще раза в интервал на одну ошибку,
+        # повторы попадут в периодическую сводку
+        report = error_tracker.record(context.error)
+        if report:
+            await notify_error(context.bot, report)
     except Exception as e:
         logger.error(f"Ошибка в error_callback: {e}")
 
+async def notify_error(bot, report):
+    """Уведомление администраторов об ошибке (отчёт ErrorTracker)"""
+    admin_error_text = (
+        f"🚨 <b>ОШИБКА В БОТЕ</b>\n\n"
+        f"<b>{escape_html(report['type'])}</b> <code>{report['fingerprint']}</code>\n"
+        f"📍 {escape_html(report['where'])}\n"
+        f"<code>{escape_html(report['message'])}</code>\n\n"
+        f"🔁 За {ERROR_WINDOW // 60} мин: {report['window_count']}, "
+        f"всего: {report['total']}\n"
+        f"Повторы в ближайшие {ERROR_NOTIFY_INTERVAL // 60} мин придут сводкой. "
+        "Список ошибок: /errors"
+    )
+    
+    await notifier.send_many(bot, ADMIN_IDS, admin_error_text, parse_mode='HTML')
+
+def format_error_list(reports) -> str:
+    """Строки списка ошибок для сводки и /errors"""
+    return "\n".join(
+        f"• <code>{r['fingerprint']}</code> <b>{escape_html(r['type'])}</b> ×{r['count']}\n"
+        f"   📍 {escape_html(r['where'])}"
+        for r in reports
+    )
+
+# ============= ФОНОВЫЕ ЗАДАЧИ =============
+
+async def flush_activity_job(context):
+    """Периодическая запись накопленной активности пользователей"""
+    try:
+        await adb.flush_activity()
+    except Exception as e:
+        logger.error(f"Ошибка записи активности: {e}")
+
+async def flush_events_job(context):
+    """Периодическая запись накопленных событий в statistics"""
+    try:
+        await adb.flush_events()
+    except Exception as e:
+        logger.error(f"Ошибка записи событий: {e}")
+
+async def error_digest_job(context):
+    """Сводка по ошибкам, уведомления о которых были подавлены"""
+    reports = error_tracker.digest()
+    if not reports:
+        return
+    
+    text = (
+        "📋 <b>Сводка ошибок</b>\n"
+        f"Повторы после последнего уведомления:\n\n"
+        + format_error_list(reports[:15])
+    )
+    await notifier.send_many(context.bot, ADMIN_IDS, text, parse_mode='HTML')
+
+async def purge_outbox_job(context):
+    """Удаление старых записей из очереди исходящих"""
+    try:
+        removed = await adb.purge_outbox(OUTBOX_KEEP_DAYS)
+        if removed:
+            logger.info(f"Outbox: удалено старых сообщений: {removed}")
+    except Exception as e:
+        logger.error(f"Ошибка очистки outbox: {e}")
+
+async def archive_orders_job(context):
+    """Перенос давно завершённых заказов в архивные таблицы"""
+    try:
+        moved = await adb.archive_orders(ARCHIVE_AFTER_DAYS)
+        if moved:
+            logger.info(f"Архив: перенесено заказов: {moved}")
+    except Exception as e:
+        logger.error(f"Ошибка архивации заказов: {e}")
+
+def schedule_maintenance(application: Application):
+    """Фоновое обслуживание, которое идёт в одном экземпляре на всё приложение
+    
+    Сводка ошибок, очистка outbox и архивация заказов. В многопроцессном
+    режиме их ведёт супервизор, а не рабочие процессы.
+    """
+    application.job_queue.run_repeating(
+        error_digest_job,
+        interval=ERROR_DIGEST_INTERVAL,
+        first=ERROR_DIGEST_INTERVAL
+    )
+    application.job_queue.run_repeating(purge_outbox_job, interval=24 * 3600, first=60)
+    application.job_queue.run_repeating(archive_orders_job, interval=24 * 3600, first=300)
+
 # ============= ДОПОЛНИТЕЛЬНЫЕ КОМАНДЫ =============
 
 @track_activity
 @log_command
 async def help_command(update: Update, context):
     """Команда /help"""
-    text = (
-        "❓ <b>Помощь</b>\n\n"
-        
-        "<b>Основные команды:</b>\n"
-        "/start - Главное меню\n"
-        "/help - Эта справка\n"
-        "/orders - Мои заказы\n"
-        "/support - Связаться с поддержкой\n\n"
-        
-        "<b>Как заказать бота:</b>\n"
-        "1. Нажмите «🛒 Заказать бота»\n"
-        "2. Выберите тариф\n"
-        "3. Заполните информацию\n"
-        "4. Дождитесь ответа менеджера\n\n"
-        
-        "<b>Отслеживание заказа:</b>\n"
-        "Статус заказа можно посмотреть в разделе "
-        "«📦 Мои заказы». Вы получите уведомление при "
-        "каждом изменении статуса.\n\n"
-        
-        "Вопросы? Пишите в /support"
-    )
+    text, reply_markup = screens.help()
     
-    await update.message.reply_text(text, parse_mode='HTML')
+    await update.message.reply_text(
+        text,
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
 
 @track_activity
 @log_command
 async def orders_command(update: Update, context):
     """Команда /orders - быстрый доступ к заказам"""
-    user_id = update.effective_user.id
-    orders = db.get_user_orders(user_id)
-    
-    # Используем тот же код, что и в функции show_my_orders, но без callback
-    if not orders:
-        text = (
-            "📦 <b>Ваши заказы</b>\n\n"
-            "У вас пока нет заказов.\n\n"
-            "Создайте первый заказ, чтобы начать работу с нами!"
-        )
-        keyboard = [
-            [InlineKeyboardButton(BUTTONS['order'], callback_data='order')],
-            [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
-        ]
-    else:
-        text = f"📦 <b>Ваши заказы ({len(orders)}):</b>\n\n"
-        
-        for order in orders[:10]:  # Показываем последние 10
-            status = ORDER_STATUSES.get(order['status'], order['status'])
-            text += (
-                f"🔹 <b>Заказ #{order['order_number']}</b>\n"
-                f"   Тариф: {order['tariff']}\n"
-                f"   Статус: {status}\n"
-                f"   Дата: {order['created_at'][:10]}\n\n"
-            )
-        
-        keyboard = []
-        for order in orders[:10]:
-            keyboard.append([InlineKeyboardButton(
-                f"#{order['order_number']} - {ORDER_STATUSES.get(order['status'])}",
-                callback_data=f"view_order_{order['id']}"
-            )])
-        keyboard.append([InlineKeyboardButton(BUTTONS['back'], callback_data='start')])
+    text, reply_markup = await build_user_orders(
+        update.effective_user.id, context.user_data
+    )
     
     await update.message.reply_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
@@ -175,7 +218,7 @@ async def admin_command(update: Update, context):
     """Команда /admin - быстрый доступ к админке"""
     # Правильная реализация без модификации объекта Update
     
-    stats = db.get_statistics()
+    stats = await adb.get_statistics()
     
     text = (
         "👨‍💼 <b>Панель администратора</b>\n\n"
@@ -206,7 +249,7 @@ async def admin_command(update: Update, context):
 @log_command
 async def stats_command(update: Update, context):
     """Команда /stats - быстрая статистика"""
-    stats = db.get_statistics()
+    stats = await adb.get_statistics()
     
     text = (
         "📊 <b>Быстрая статистика</b>\n\n"
@@ -218,56 +261,81 @@ async def stats_command(update: Update, context):
     
     await update.message.reply_text(text, parse_mode='HTML')
 
+@admin_only
+@log_command
+async def recount_command(update: Update, context):
+    """Команда /recount - пересчёт счётчиков и дневных агрегатов с нуля"""
+    stats = await adb.rebuild_counters()
+    await adb.rebuild_rollups()
+    
+    text = (
+        "🔄 <b>Счётчики пересчитаны</b>\n\n"
+        f"👥 Пользователей: {stats['total_users']}\n"
+        f"📦 Заказов: {stats['total_orders']}\n"
+        f"🆕 Сегодня: {stats['orders_today']}"
+    )
+    
+    await update.message.reply_text(text, parse_mode='HTML')
+
+@admin_only
+@log_command
+async def errors_command(update: Update, context):
+    """Команда /errors - самые частые ошибки за окно"""
+    reports = error_tracker.top(10)
+    
+    if not reports:
+        await update.message.reply_text(
+            f"✅ За последние {ERROR_WINDOW // 60} мин ошибок не было"
+        )
+        return
+    
+    for report in reports:
+        report['count'] = report['window_count']
+    
+    text = (
+        f"🚨 <b>Частые ошибки за {ERROR_WINDOW // 60} мин</b>\n\n"
+        + format_error_list(reports)
+    )
+    
+    await update.message.reply_text(text, parse_mode='HTML')
+
 @track_activity
 @log_command
 async def support_command(update: Update, context):
     """Команда /support - быстрый доступ к поддержке"""
-    text = (
-        "<b>💬 Служба поддержки</b>\n\n"
-        "Мы всегда на связи! Выберите удобный способ:\n\n"
-        "📱 <b>Telegram:</b> @botfactory_support\n"
-        "📧 <b>Email:</b> support@botfactory.ru\n\n"
-        "⏰ <b>Режим работы:</b>\n"
-        "Пн-Пт: 9:00 - 21:00 (МСК)\n"
-        "Сб-Вс: 10:00 - 18:00 (МСК)\n\n"
-        "⚡ Среднее время ответа: 15 минут\n"
-        "🎯 В нерабочее время отвечаем до 2 часов\n\n"
-        "💡 <b>Совет:</b> Для быстрого ответа пишите в Telegram"
-    )
+    text, reply_markup = screens.support()
     
     await update.message.reply_text(
         text,
-        reply_markup=kb.back_button(),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
 # ============= НАСТРОЙКА БОТА =============
 
-def main():
-    """Запуск бота"""
-    
-    # Проверка токена
-    if not BOT_TOKEN or BOT_TOKEN == 'YOUR_BOT_TOKEN':
-        logger.error("❌ Токен бота не установлен! Проверьте файл .env")
-        sys.exit(1)
-    
-    # Проверка админов
-    if not ADMIN_IDS or ADMIN_IDS == [123456789]:
-        logger.warning("⚠️ ID администраторов не настроены!")
-    
-    logger.info("🤖 Запуск бота...")
+def build_application(bot=None, primary: bool = True) -> Application:
+    """Создание приложения со всеми обработчиками и фоновыми задачами
     
-    # Создание приложения
-    application = Application.builder().token(BOT_TOKEN).build()
+    bot - готовый экземпляр бота (например, заглушка для локальной
+    проверки); по умолчанию бот создаётся по BOT_TOKEN.
+    primary=False - рабочий процесс в многопроцессном режиме: уведомление
+    о запуске и разбор прерванных отправок делает супервизор.
+    """
+    builder = Application.builder().persistence(SQLitePersistence())
+    if bot is None:
+        builder.token(BOT_TOKEN)
+    else:
+        builder.bot(bot)
+    application = builder.build()
     
     # ============= ОБРАБОТЧИК ЗАКАЗОВ =============
     order_conversation = ConversationHandler(
         entry_points=[
-            CallbackQueryHandler(start_order, pattern='^order$')
+            CallbackRouter().add('order', start_order)
         ],
         states={
             SELECT_TARIFF: [
-                CallbackQueryHandler(select_tariff, pattern='^tariff_')
+                CallbackRouter().add('tariff', select_tariff, str)
             ],
             ENTER_NAME: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, enter_name)
@@ -276,24 +344,24 @@ def main():
                 MessageHandler(filters.TEXT & ~filters.COMMAND, enter_description)
             ],
             SELECT_BUDGET: [
-                CallbackQueryHandler(select_budget, pattern='^budget_')
+                CallbackRouter().add('budget', select_budget, str)
             ],
             ENTER_CONTACT: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, enter_contact)
             ]
         },
         fallbacks=[
-            CallbackQueryHandler(cancel_order, pattern='^cancel_order$'),
+            CallbackRouter().add('cancel_order', cancel_order),
             CommandHandler('start', start)
         ],
         name="order_conversation",
-        persistent=False
+        persistent=True
     )
     
     # ============= ОБРАБОТЧИК ИЗМЕНЕНИЯ СТАТУСА =============
     status_conversation = ConversationHandler(
         entry_points=[
-            CallbackQueryHandler(admin_set_status, pattern='^setstatus_')
+            CallbackRouter().add('setstatus', admin_set_status, int, str)
         ],
         states={
             ADMIN_COMMENT: [
@@ -301,16 +369,16 @@ def main():
             ]
         },
         fallbacks=[
-            CallbackQueryHandler(admin_panel, pattern='^admin_panel$')
+            CallbackRouter().add('admin_panel', admin_panel)
         ],
         name="status_conversation",
-        persistent=False
+        persistent=True
     )
     
     # ============= ОБРАБОТЧИК СООБЩЕНИЙ АДМИНА =============
     message_conversation = ConversationHandler(
         entry_points=[
-            CallbackQueryHandler(admin_message_start, pattern='^admin_message_')
+            CallbackRouter().add('admin_message', admin_message_start, int)
         ],
         states={
             ADMIN_MESSAGE: [
@@ -318,11 +386,11 @@ def main():
             ]
         },
         fallbacks=[
-            CallbackQueryHandler(admin_panel, pattern='^admin_panel$'),
+            CallbackRouter().add('admin_panel', admin_panel),
             CommandHandler('start', start)
         ],
         name="message_conversation",
-        persistent=False
+        persistent=True
     )
     
     # ============= КОМАНДЫ =============
@@ -331,6 +399,10 @@ def main():
     application.add_handler(CommandHandler("orders", orders_command))
     application.add_handler(CommandHandler("admin", admin_command))
     application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("recount", recount_command))
+    application.add_handler(CommandHandler("errors", errors_command))
+    application.add_handler(CommandHandler("broadcast", broadcast_command))
+    application.add_handler(CommandHandler("find", find_command))
     application.add_handler(CommandHandler("support", support_command))
     
     # ============= CONVERSATION HANDLERS =============
@@ -338,62 +410,168 @@ def main():
     application.add_handler(status_conversation)
     application.add_handler(message_conversation)
     
-    # ============= CALLBACK HANDLERS - ПОЛЬЗОВАТЕЛИ =============
-    application.add_handler(CallbackQueryHandler(start, pattern='^start$'))
-    application.add_handler(CallbackQueryHandler(show_tariffs, pattern='^tariffs$'))
-    application.add_handler(CallbackQueryHandler(show_my_orders, pattern='^my_orders$'))
-    application.add_handler(CallbackQueryHandler(show_order_detail, pattern='^view_order_'))
-    application.add_handler(CallbackQueryHandler(show_about, pattern='^about$'))
-    application.add_handler(CallbackQueryHandler(show_support, pattern='^support$'))
-    application.add_handler(CallbackQueryHandler(show_reviews, pattern='^reviews$'))
-    application.add_handler(CallbackQueryHandler(show_portfolio, pattern='^portfolio$'))
-    # Новые обработчики чата
-    application.add_handler(CallbackQueryHandler(start_direct_chat, pattern='^start_chat$'))
-    application.add_handler(CallbackQueryHandler(start_order_chat, pattern='^chat_order_'))
-    
-    # ============= CALLBACK HANDLERS - АДМИН =============
-    application.add_handler(CallbackQueryHandler(admin_panel, pattern='^admin_panel$'))
-    application.add_handler(CallbackQueryHandler(admin_orders, pattern='^admin_orders$'))
-    application.add_handler(CallbackQueryHandler(admin_new_orders, pattern='^admin_new_orders$'))
-    application.add_handler(CallbackQueryHandler(admin_order_detail, pattern='^admin_order_'))
-    application.add_handler(CallbackQueryHandler(admin_change_status_menu, pattern='^admin_status_'))
-    application.add_handler(CallbackQueryHandler(admin_order_history, pattern='^admin_history_'))
-    application.add_handler(CallbackQueryHandler(show_order_chat, pattern='^admin_chat_'))
-    application.add_handler(CallbackQueryHandler(admin_users, pattern='^admin_users$'))
-    application.add_handler(CallbackQueryHandler(admin_stats, pattern='^admin_stats$'))
+    # ============= CALLBACK-КНОПКИ =============
+    # Один обработчик на все кнопки: действие ищется по словам callback_data,
+    # аргументы приходят в context.args уже нужного типа (utils/router.py)
+    router = CallbackRouter()
+    
+    # Пользователи
+    router.add('start', start)
+    router.add('tariffs', show_tariffs)
+    router.add('my_orders', show_my_orders, int, optional=1)
+    router.add('view_order', show_order_detail, int)
+    router.add('about', show_about)
+    router.add('support', show_support)
+    router.add('reviews', show_reviews)
+    router.add('portfolio', show_portfolio)
+    router.add('page_info', page_info)
+    router.add('start_chat', start_direct_chat)
+    router.add('chat_order', start_order_chat, int)
+    
+    # Администраторы
+    router.add('admin_panel', admin_panel)
+    router.add('admin_orders', admin_orders, int, optional=1)
+    router.add('admin_new_orders', admin_new_orders, int, optional=1)
+    router.add('admin_order', admin_order_detail, int)
+    router.add('admin_status', admin_change_status_menu, int)
+    router.add('admin_history', admin_order_history, int)
+    router.add('admin_chat', show_order_chat, int, int, optional=1)
+    router.add('admin_users', admin_users, int, optional=1)
+    router.add('admin_stats', admin_stats)
+    router.add('admin_trends', admin_trends, int, optional=1)
+    router.add('find', find_page, int, optional=1)
+    router.add('broadcast_confirm', broadcast_confirm, int)
+    router.add('broadcast_cancel', broadcast_cancel, int)
+    router.add('broadcast_stop', broadcast_cancel, int)
+    
+    application.add_handler(router)
+    
+    # ============= СОБЫТИЯ ДЛЯ АНАЛИТИКИ =============
+    # Кнопки записывает роутер, разобравший callback_data (в том числе в диалогах)
+    async def record_button(update: Update, route):
+        user_id = update.effective_user.id if update.effective_user else None
+        await adb.record_event('button', {'a': route.action[:32], 'u': user_id})
+    
+    CallbackRouter.on_route = record_button
+    
+    # Команды - группа -1 видит каждое обновление раньше обработчиков и не мешает им
+    async def record_update(update: Update, context):
+        message = update.message
+        if message and message.text and message.text.startswith('/'):
+            user_id = update.effective_user.id if update.effective_user else None
+            command = message.text.split(None, 1)[0].split('@', 1)[0]
+            await adb.record_event('command', {'c': command[:32], 'u': user_id})
+    
+    application.add_handler(TypeHandler(Update, record_update), group=-1)
     
     # ============= ОБРАБОТЧИК ОШИБОК =============
     application.add_error_handler(error_callback)
     
+    # ============= ФОНОВЫЕ ЗАДАЧИ =============
+    application.job_queue.run_repeating(
+        flush_activity_job,
+        interval=ACTIVITY_FLUSH_INTERVAL,
+        first=ACTIVITY_FLUSH_INTERVAL
+    )
+    application.job_queue.run_repeating(
+        flush_events_job,
+        interval=EVENTS_FLUSH_INTERVAL,
+        first=EVENTS_FLUSH_INTERVAL
+    )
+    if primary:
+        schedule_maintenance(application)
+    
     # Обработчик для ответов пользователя (должен быть последним!)
     application.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND,  # Упрощенный фильтр
         process_user_reply
     ))
     
-    # ============= ЗАПУСК =============
-    logger.info("✅ Бот успешно запущен!")
-    logger.info(f"👨‍💼 Администраторы: {ADMIN_IDS}")
-    
-    # Уведомляем администраторов о запуске
+    # Запускаем отправку из очереди и уведомляем администраторов о запуске.
+    # В многопроцессном режиме очередь отправляет супервизор (workers.py)
     async def post_init(application):
-        for admin_id in ADMIN_IDS:
-            try:
-                await application.bot.send_message(
-                    chat_id=admin_id,
-                    text="✅ <b>Бот успешно запущен!</b>",
-                    parse_mode='HTML'
-                )
-            except Exception as e:
-                logger.warning(f"Не удалось уведомить админа {admin_id}: {e}")
+        warm_up()
+        if not primary:
+            return
+        
+        outbox.start(application.bot)
+        await broadcaster.resume(application.bot)
+        await notify_started(application)
+    
+    # Останавливаем очередь отправки и закрываем пул соединений с БД
+    async def post_shutdown(application):
+        await broadcaster.stop()
+        await chat_digest.flush_all()
+        await outbox.stop()
+        adb.close()
     
     application.post_init = post_init
+    application.post_shutdown = post_shutdown
     
-    # Запуск polling
-    application.run_polling(
-        allowed_updates=Update.ALL_TYPES,
-        drop_pending_updates=True
+    return application
+
+async def notify_started(application: Application):
+    """Уведомление администраторов о запуске"""
+    results = await notifier.send_many(
+        application.bot, ADMIN_IDS,
+        "✅ <b>Бот успешно запущен!</b>",
+        parse_mode='HTML'
     )
+    for result in results:
+        if not result.ok:
+            logger.warning(f"Не удалось уведомить админа {result.chat_id}: {result.error}")
+
+def run_application(application: Application):
+    """Запуск в режиме BOT_MODE: polling или webhook"""
+    if BOT_MODE == 'webhook':
+        if not WEBHOOK_URL:
+            logger.error("❌ Для режима webhook нужен WEBHOOK_URL")
+            sys.exit(1)
+        
+        logger.info(
+            f"🌐 Webhook: слушаем {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}"
+        )
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=False
+        )
+    else:
+        application.run_polling(
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=False
+        )
+
+def main():
+    """Запуск бота"""
+    
+    # Проверка токена
+    if not BOT_TOKEN or BOT_TOKEN == 'YOUR_BOT_TOKEN':
+        logger.error("❌ Токен бота не установлен! Проверьте файл .env")
+        sys.exit(1)
+    
+    # Проверка админов
+    if not ADMIN_IDS or ADMIN_IDS == [123456789]:
+        logger.warning("⚠️ ID администраторов не настроены!")
+    
+    logger.info("🤖 Запуск бота...")
+    
+    if BOT_WORKERS > 1:
+        from workers import run_supervisor
+        run_supervisor(BOT_WORKERS)
+        return
+    
+    application = build_application()
+    
+    # ============= ЗАПУСК =============
+    logger.info("✅ Бот успешно запущен!")
+    logger.info(f"👨‍💼 Администраторы: {ADMIN_IDS}")
+    
+    run_application(application)
 
 if __name__ == '__main__':
     try:
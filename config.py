@@ -6,14 +6,89 @@ load_dotenv()
 # Токен бота
 BOT_TOKEN = os.getenv('BOT_TOKEN', 'YOUR_BOT_TOKEN')
 
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+
+# Webhook: бот слушает WEBHOOK_LISTEN:WEBHOOK_PORT/WEBHOOK_PATH (за балансировщиком),
+# Telegram шлёт обновления на WEBHOOK_URL/WEBHOOK_PATH
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+
+# Количество рабочих процессов (больше 1 - многопроцессный режим, см. workers.py)
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))
+
 # ID администраторов (можно несколько)
 ADMIN_IDS = list(map(int, os.getenv('ADMIN_IDS', '123456789').split(',')))
 
 # База данных
-DATABASE_NAME = 'bot_orders.db'
+DATABASE_NAME = os.getenv('DATABASE_NAME', 'bot_orders.db')
+DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', '4'))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_CACHED_STATEMENTS = int(os.getenv('DB_CACHED_STATEMENTS', '256'))
+DB_QUEUE_SIZE = int(os.getenv('DB_QUEUE_SIZE', '1000'))
+
+# Отложенная запись активности пользователей
+ACTIVITY_FLUSH_INTERVAL = 5  # секунд
+ACTIVITY_FLUSH_SIZE = 500  # записей в буфере
+ACTIVITY_PROFILE_CACHE_SIZE = 10000
+
+# События для аналитики (таблица statistics): буфер в памяти, запись пачками
+EVENTS_FLUSH_INTERVAL = 10  # секунд
+EVENTS_FLUSH_SIZE = 1000  # событий в буфере - сбросить досрочно
+EVENTS_BUFFER_BYTES = 2 * 1024 * 1024  # предел буфера; сверх него события отбрасываются
+
+# Сохранение диалогов и user_data в БД: период записи изменений
+PERSISTENCE_FLUSH_INTERVAL = 30  # секунд
+
+# Кэш списка администраторов
+ADMIN_CACHE_TTL = 300  # секунд
+
+# Кэш заказов (LRU, количество записей)
+ORDER_CACHE_SIZE = int(os.getenv('ORDER_CACHE_SIZE', '1000'))
+
+# Лимиты отправки сообщений (ограничения Telegram)
+NOTIFY_GLOBAL_RATE = 30  # сообщений в секунду на бота
+NOTIFY_CHAT_RATE = 1  # сообщений в секунду в один чат
+NOTIFY_CHAT_BURST = 3  # допустимая пачка подряд в один чат
+NOTIFY_MAX_RETRIES = 3  # повторов после RetryAfter
+
+# Очередь исходящих сообщений
+OUTBOX_BATCH_SIZE = 20  # сообщений за один проход
+OUTBOX_MAX_ATTEMPTS = 5  # попыток до пометки failed
+OUTBOX_RETRY_DELAY = 2  # секунд, удваивается с каждой попыткой
+OUTBOX_POLL_INTERVAL = 30  # секунд, если никто не разбудил
+OUTBOX_KEEP_DAYS = 7  # сколько хранить отправленные сообщения
+
+# Архив завершённых и отменённых заказов
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))  # дней без изменений
+ARCHIVE_BATCH_SIZE = 200  # заказов за одну транзакцию
+ARCHIVE_COMPRESS_MIN = 128  # байт: более короткие тексты не сжимаются
+
+# Рассылки всем пользователям
+BROADCAST_RATE = 20  # сообщений в секунду (запас под обычную работу бота)
+BROADCAST_CHUNK = 100  # получателей между сохранениями прогресса
+BROADCAST_PROGRESS_INTERVAL = 5  # секунд между обновлениями прогресса
+
+# Объединение сообщений клиента в одно уведомление админам
+CHAT_COALESCE_SECONDS = 5  # окно сбора сообщений по заказу
+CHAT_EDIT_WINDOW = 120  # секунд, в течение которых уведомление дополняется правкой
+
+# Агрегация ошибок
+ERROR_WINDOW = 3600  # секунд, окно подсчёта повторов
+ERROR_NOTIFY_INTERVAL = 600  # секунд, не чаще одного уведомления на ошибку
+ERROR_DIGEST_INTERVAL = 3600  # секунд, период сводки по подавленным ошибкам
 
 # Настройки
 ITEMS_PER_PAGE = 5
+USER_ORDERS_PER_PAGE = 10
+ADMIN_ORDERS_PER_PAGE = 20
+ADMIN_USERS_PER_PAGE = 15
+MESSAGES_PER_PAGE = 20
+SEARCH_RESULTS_PER_PAGE = 10
+TRENDS_PERIODS = (7, 30, 90)  # дней на экране динамики, первый - по умолчанию
 ORDER_TIMEOUT_HOURS = 48
 
 # Тарифы
@@ -124,6 +199,17 @@ ORDER_STATUSES = {
     'paid': '💳 Оплачен'
 }
 
+# Допустимые переходы между статусами: текущий -> возможные новые
+ORDER_TRANSITIONS = {
+    'new': ['in_progress', 'paid', 'cancelled'],
+    'in_progress': ['review', 'revision', 'completed', 'paid', 'cancelled'],
+    'review': ['in_progress', 'revision', 'completed', 'paid', 'cancelled'],
+    'revision': ['in_progress', 'review', 'completed', 'paid', 'cancelled'],
+    'completed': ['revision', 'paid'],
+    'cancelled': ['new'],
+    'paid': ['in_progress', 'review', 'revision', 'completed', 'cancelled']
+}
+
 # Текста для кнопок
 BUTTONS = {
     'order': '🛒 Заказать',
@@ -1,159 +1,369 @@
+import asyncio
+import functools
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import time
+import queue
+import zlib
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
 import json
+import logging
+
+from config import (
+    DATABASE_NAME, DB_READ_POOL_SIZE, DB_BUSY_TIMEOUT_MS, DB_CACHED_STATEMENTS,
+    DB_QUEUE_SIZE, ORDER_STATUSES, ORDER_TRANSITIONS,
+    ACTIVITY_FLUSH_SIZE, ACTIVITY_PROFILE_CACHE_SIZE,
+    ADMIN_IDS, ADMIN_CACHE_TTL, ORDER_CACHE_SIZE,
+    ARCHIVE_BATCH_SIZE, ARCHIVE_COMPRESS_MIN,
+    EVENTS_FLUSH_SIZE, EVENTS_BUFFER_BYTES
+)
+from migrations import MIGRATIONS
+
+logger = logging.getLogger(__name__)
+
+# Обратная таблица переходов: новый статус -> статусы, из которых в него можно попасть
+STATUS_SOURCES = {
+    status: tuple(old for old, targets in ORDER_TRANSITIONS.items() if status in targets)
+    for status in ORDER_STATUSES
+}
+
+# Границы найденных слов во фрагментах поиска: управляющие символы, которых
+# нет в тексте, - фрагмент экранируется для HTML уже после выборки
+SNIPPET_MARKS = ('\x02', '\x03')
+SEARCH_MAX_WORDS = 8
+
+# Статусы, с которыми заказ уходит в архив
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+
+# Колонки архивных таблиц в том же порядке, что и в основных; сжатые
+# тексты разворачиваются функцией zunpack, поэтому строки совпадают по виду
+ARCHIVED_ORDER_COLUMNS = '''
+    id, user_id, order_number, name, contact, tariff,
+    zunpack(description) AS description, budget, status,
+    zunpack(admin_comment) AS admin_comment, created_at, updated_at, completed_at
+'''
+ARCHIVED_MESSAGE_COLUMNS = '''
+    id, order_id, user_id, is_admin, admin_id, zunpack(message) AS message, created_at
+'''
+ARCHIVED_HISTORY_COLUMNS = '''
+    id, order_id, old_status, new_status, zunpack(comment) AS comment,
+    changed_by, created_at
+'''
+
+def zpack(text):
+    """SQL-функция: сжать длинный текст в BLOB (короткий остаётся текстом)"""
+    if not isinstance(text, str):
+        return text
+    data = text.encode()
+    if len(data) < ARCHIVE_COMPRESS_MIN:
+        return text
+    return zlib.compress(data, 9)
+
+def zunpack(value):
+    """SQL-функция: обратное к zpack"""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode()
+    return value
+
+class InvalidStatusTransition(ValueError):
+    """Недопустимая смена статуса заказа"""
+    
+    def __init__(self, order_id: int, old_status: Optional[str], new_status: str):
+        self.order_id = order_id
+        self.old_status = old_status
+        self.new_status = new_status
+        super().__init__(
+            f"Заказ {order_id}: переход {old_status} -> {new_status} недопустим"
+        )
+
+def reader(method):
+    """Метод только читает БД: AsyncDatabase выполняет его в потоках читателей"""
+    method.reader = True
+    return method
 
 class Database:
-    def __init__(self, db_name='bot_orders.db'):
+    def __init__(self, db_name=DATABASE_NAME, read_pool_size=DB_READ_POOL_SIZE):
         self.db_name = db_name
+        self.read_pool_size = max(1, read_pool_size)
+        
+        # Один писатель (запись сериализуется блокировкой) и пул читателей
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute('PRAGMA journal_mode = WAL')
+        
+        self._readers = queue.LifoQueue()
+        for _ in range(self.read_pool_size):
+            self._readers.put(self._connect(readonly=True))
+        
+        # Буфер активности: user_id -> (username, first_name, last_name, время)
+        self._activity_lock = threading.Lock()
+        self._activity = {}
+        # Профили, которые уже записаны в БД (чтобы не переписывать их зря)
+        self._profiles = OrderedDict()
+        
+        # Буфер событий для statistics: (тип, данные JSON, время)
+        self._events_lock = threading.Lock()
+        self._events = []
+        self._events_bytes = 0
+        self._events_dropped = 0  # отброшено с последней записи
+        self._events_written = 0
+        self._events_dropped_total = 0
+        
+        # Кэш администраторов: ADMIN_IDS + users.is_admin
+        self._admins = None
+        self._admins_loaded_at = 0.0
+        
+        # LRU-кэш заказов по id
+        self._order_cache_lock = threading.Lock()
+        self._order_cache = OrderedDict()
+        self._order_cache_size = ORDER_CACHE_SIZE
+        self._order_cache_gen = 0
+        self._order_hits = 0
+        self._order_misses = 0
+        
+        self._closed = False
         self.init_db()
     
-    def get_connection(self):
-        return sqlite3.connect(self.db_name)
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """Открыть и настроить соединение для пула"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            isolation_level=None,  # транзакциями управляем сами
+            cached_statements=DB_CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        conn.create_function('zpack', 1, zpack, deterministic=True)
+        conn.create_function('zunpack', 1, zunpack, deterministic=True)
+        conn.execute(f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        if readonly:
+            conn.execute('PRAGMA query_only = 1')
+        return conn
     
-    def init_db(self):
-        """Инициализация базы данных"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Таблица пользователей
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                is_admin INTEGER DEFAULT 0,
-                is_blocked INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Таблица заказов
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                order_number TEXT UNIQUE,
-                name TEXT,
-                contact TEXT,
-                tariff TEXT,
-                description TEXT,
-                budget TEXT,
-                status TEXT DEFAULT 'new',
-                admin_comment TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        # Таблица истории статусов
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS order_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER,
-                old_status TEXT,
-                new_status TEXT,
-                comment TEXT,
-                changed_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (order_id) REFERENCES orders(id)
-            )
-        ''')
-        
-        # Таблица отзывов
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reviews (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                order_id INTEGER,
-                rating INTEGER,
-                text TEXT,
-                is_published INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (order_id) REFERENCES orders(id)
-            )
-        ''')
-        
-        # Таблица статистики
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS statistics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT,
-                event_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Таблица сообщений
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER,
-                user_id INTEGER,
-                is_admin INTEGER DEFAULT 0,
-                admin_id INTEGER,
-                message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (order_id) REFERENCES orders(id),
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
+    @contextmanager
+    def _write(self):
+        """Транзакция на запись через единственное соединение-писатель"""
+        with self._write_lock:
+            conn = self._writer
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn.cursor()
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+    
+    @contextmanager
+    def _read(self):
+        """Курсор на чтение из пула соединений"""
+        conn = self._readers.get()
+        try:
+            yield conn.cursor()
+        finally:
+            self._readers.put(conn)
+    
+    def close(self):
+        """Закрыть все соединения пула (вызывается при остановке бота)"""
+        if self._closed:
+            return
+        self._closed = True
+        
+        self.flush_activity()
+        self.flush_events()
         
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            try:
+                self._writer.execute('PRAGMA optimize')
+            finally:
+                self._writer.close()
+        
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+    
+    def init_db(self):
+        """Инициализация базы данных: применяем недостающие миграции"""
+        for version, statements in enumerate(MIGRATIONS, start=1):
+            with self._write() as cursor:
+                # Версию читаем внутри транзакции: другой процесс мог
+                # уже применить эту миграцию
+                cursor.execute('PRAGMA user_version')
+                if cursor.fetchone()[0] >= version:
+                    continue
+                
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(f'PRAGMA user_version = {version}')
     
     # ========== РАБОТА С ПОЛЬЗОВАТЕЛЯМИ ==========
     
     def add_user(self, user_id: int, username: str = None, 
                  first_name: str = None, last_name: str = None):
         """Добавить/обновить пользователя"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO users (user_id, username, first_name, last_name)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET
-                username = excluded.username,
-                first_name = excluded.first_name,
-                last_name = excluded.last_name,
-                last_activity = CURRENT_TIMESTAMP
-        ''', (user_id, username, first_name, last_name))
-        
-        conn.commit()
-        conn.close()
+        with self._write() as cursor:
+            cursor.execute('''
+                INSERT INTO users (user_id, username, first_name, last_name)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO NOTHING
+            ''', (user_id, username, first_name, last_name))
+            
+            if cursor.rowcount:
+                self._bump(cursor, {'users': 1, f'users:day:{self._today()}': 1})
+                self._rollup(cursor, [('users', '', '', 1)])
+                return
+            
+            cursor.execute('''
+                UPDATE users SET
+                    username = ?,
+                    first_name = ?,
+                    last_name = ?,
+                    last_activity = CURRENT_TIMESTAMP
+                WHERE user_id = ?
+            ''', (username, first_name, last_name, user_id))
+    
+    def touch_user(self, user_id: int, username: str = None,
+                   first_name: str = None, last_name: str = None) -> bool:
+        """Отметить активность пользователя без записи в БД.
+        
+        Запись выполняет flush_activity() пакетом; повторные отметки одного
+        пользователя схлопываются. Возвращает True, если буфер пора сбросить.
+        """
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._activity_lock:
+            self._activity[user_id] = (username, first_name, last_name, now)
+            return len(self._activity) >= ACTIVITY_FLUSH_SIZE
     
+    def flush_activity(self) -> int:
+        """Записать накопленную активность одной транзакцией"""
+        with self._activity_lock:
+            pending, self._activity = self._activity, {}
+        
+        if not pending:
+            return 0
+        
+        new_users, changed, touched = [], [], []
+        for user_id, (username, first_name, last_name, seen_at) in pending.items():
+            known = self._profiles.get(user_id)
+            if known is None:
+                new_users.append((user_id, username, first_name, last_name, seen_at))
+                changed.append((username, first_name, last_name, seen_at, user_id))
+            elif known != (username, first_name, last_name):
+                changed.append((username, first_name, last_name, seen_at, user_id))
+            else:
+                # Профиль не менялся - обновляем только время активности
+                touched.append((seen_at, user_id))
+        
+        try:
+            with self._write() as cursor:
+                if new_users:
+                    cursor.executemany('''
+                        INSERT INTO users
+                        (user_id, username, first_name, last_name, last_activity)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(user_id) DO NOTHING
+                    ''', new_users)
+                    
+                    if cursor.rowcount > 0:
+                        added = cursor.rowcount
+                        self._bump(cursor, {
+                            'users': added,
+                            f'users:day:{self._today()}': added
+                        })
+                        self._rollup(cursor, [('users', '', '', added)])
+                
+                # Для пользователей, которых ещё нет в кэше профилей, профиль
+                # тоже обновляем: они могли быть в БД до перезапуска
+                cursor.executemany('''
+                    UPDATE users SET
+                        username = ?,
+                        first_name = ?,
+                        last_name = ?,
+                        last_activity = ?,
+                        is_blocked = 0
+                    WHERE user_id = ?
+                ''', changed)
+                
+                cursor.executemany(
+                    'UPDATE users SET last_activity = ?, is_blocked = 0 WHERE user_id = ?',
+                    touched
+                )
+        except Exception:
+            # Возвращаем непринятые записи в буфер (более свежие не затираем)
+            with self._activity_lock:
+                for user_id, entry in pending.items():
+                    self._activity.setdefault(user_id, entry)
+            raise
+        
+        with self._activity_lock:
+            for user_id, (username, first_name, last_name, _) in pending.items():
+                self._profiles[user_id] = (username, first_name, last_name)
+                self._profiles.move_to_end(user_id)
+            while len(self._profiles) > ACTIVITY_PROFILE_CACHE_SIZE:
+                self._profiles.popitem(last=False)
+        
+        return len(pending)
+    
+    @reader
     def get_user(self, user_id: int) -> Optional[Dict]:
         """Получить пользователя"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._read() as cursor:
+            cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
+            row = cursor.fetchone()
         
         return dict(row) if row else None
     
     def is_admin(self, user_id: int) -> bool:
         """Проверка прав администратора"""
-        user = self.get_user(user_id)
-        return user['is_admin'] == 1 if user else False
+        admins = self.cached_admin_ids()
+        if admins is None:
+            admins = self.refresh_admins()
+        return user_id in admins
     
+    def cached_admin_ids(self) -> Optional[frozenset]:
+        """Закэшированные id администраторов (None, если кэш устарел)"""
+        if time.monotonic() - self._admins_loaded_at > ADMIN_CACHE_TTL:
+            return None
+        return self._admins
+    
+    @reader
+    def refresh_admins(self) -> frozenset:
+        """Перечитать администраторов из БД и обновить кэш"""
+        with self._read() as cursor:
+            cursor.execute('SELECT user_id FROM users WHERE is_admin = 1')
+            admins = frozenset(ADMIN_IDS).union(row[0] for row in cursor.fetchall())
+        
+        self._admins = admins
+        self._admins_loaded_at = time.monotonic()
+        return admins
+    
+    def invalidate_admins(self):
+        """Сбросить кэш администраторов (перечитается при следующей проверке)"""
+        self._admins_loaded_at = 0.0
+    
+    def set_admin(self, user_id: int, is_admin: bool = True):
+        """Выдать или отозвать права администратора"""
+        with self._write() as cursor:
+            cursor.execute(
+                'UPDATE users SET is_admin = ? WHERE user_id = ?',
+                (1 if is_admin else 0, user_id)
+            )
+        self.invalidate_admins()
+    
+    @reader
     def get_all_users(self) -> List[Dict]:
         """Получить всех пользователей"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM users ORDER BY created_at DESC')
-        rows = cursor.fetchall()
-        conn.close()
+        with self._read() as cursor:
+            cursor.execute('SELECT * FROM users ORDER BY created_at DESC, user_id DESC')
+            rows = cursor.fetchall()
         
         return [dict(row) for row in rows]
     
@@ -162,133 +372,218 @@ class Database:
     def create_order(self, user_id: int, name: str, contact: str,
                      tariff: str, description: str, budget: str) -> int:
         """Создать заказ"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Генерируем номер заказа
-        cursor.execute('SELECT COUNT(*) FROM orders')
-        count = cursor.fetchone()[0]
-        order_number = f"BO-{count + 1:05d}"
-        
-        cursor.execute('''
-            INSERT INTO orders (user_id, order_number, name, contact, 
-                              tariff, description, budget)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, order_number, name, contact, tariff, description, budget))
-        
-        order_id = cursor.lastrowid
-        
-        # Добавляем в историю
-        cursor.execute('''
-            INSERT INTO order_history (order_id, new_status, changed_by)
-            VALUES (?, 'new', ?)
-        ''', (order_id, user_id))
-        
-        conn.commit()
-        conn.close()
+        with self._write() as cursor:
+            cursor.execute('''
+                INSERT INTO orders (user_id, name, contact, 
+                                  tariff, description, budget)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (user_id, name, contact, tariff, description, budget))
+            
+            order_id = cursor.lastrowid
+            
+            # Номер заказа выводим из id (AUTOINCREMENT не переиспользует
+            # значения), поэтому он уникален и не требует COUNT(*)
+            cursor.execute(
+                'UPDATE orders SET order_number = ? WHERE id = ? RETURNING *',
+                (self.format_order_number(order_id), order_id)
+            )
+            order = dict(cursor.fetchone())
+            
+            # Добавляем в историю
+            cursor.execute('''
+                INSERT INTO order_history (order_id, new_status, changed_by)
+                VALUES (?, 'new', ?)
+            ''', (order_id, user_id))
+            
+            self._bump(cursor, {
+                'orders': 1,
+                'orders:status:new': 1,
+                f'orders:day:{self._today()}': 1
+            })
+            self._rollup(cursor, [('orders', tariff or '', '', 1)])
         
+        self._cache_order(order)
         return order_id
     
+    @staticmethod
+    def format_order_number(order_id: int) -> str:
+        """Номер заказа для отображения клиенту"""
+        return f"BO-{order_id:05d}"
+    
+    @reader
     def get_order(self, order_id: int) -> Optional[Dict]:
-        """Получить заказ"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        """Получить заказ (через LRU-кэш)"""
+        with self._order_cache_lock:
+            order = self._order_cache.get(order_id)
+            if order is not None:
+                self._order_cache.move_to_end(order_id)
+                self._order_hits += 1
+                return dict(order)
+            self._order_misses += 1
+            generation = self._order_cache_gen
         
-        cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._read() as cursor:
+            cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    f'SELECT {ARCHIVED_ORDER_COLUMNS} FROM orders_archive WHERE id = ?',
+                    (order_id,)
+                )
+                row = cursor.fetchone()
         
-        return dict(row) if row else None
-    
-    def get_user_orders(self, user_id: int) -> List[Dict]:
-        """Получить заказы пользователя"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        if row is None:
+            return None
         
-        cursor.execute('''
-            SELECT * FROM orders 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC
-        ''', (user_id,))
+        order = dict(row)
+        self._cache_order(order, generation)
+        return dict(order)
+    
+    def _cache_order(self, order: Dict, generation: int = None):
+        """Положить заказ в кэш.
         
-        rows = cursor.fetchall()
-        conn.close()
+        generation - поколение кэша на момент чтения из БД: если с тех пор
+        была запись, прочитанная строка могла устареть и в кэш не кладётся.
+        """
+        with self._order_cache_lock:
+            if generation is None:
+                self._order_cache_gen += 1
+            elif generation != self._order_cache_gen:
+                return
+            
+            self._order_cache[order['id']] = order
+            self._order_cache.move_to_end(order['id'])
+            while len(self._order_cache) > self._order_cache_size:
+                self._order_cache.popitem(last=False)
+    
+    def invalidate_order(self, order_id: int = None):
+        """Сбросить заказ (или весь кэш, если id не указан)"""
+        with self._order_cache_lock:
+            self._order_cache_gen += 1
+            if order_id is None:
+                self._order_cache.clear()
+            else:
+                self._order_cache.pop(order_id, None)
+    
+    def order_cache_stats(self) -> Dict:
+        """Счётчики кэша заказов"""
+        with self._order_cache_lock:
+            return {
+                'size': len(self._order_cache),
+                'max_size': self._order_cache_size,
+                'hits': self._order_hits,
+                'misses': self._order_misses
+            }
+    
+    @reader
+    def get_user_orders(self, user_id: int) -> List[Dict]:
+        """Получить заказы пользователя (включая архивные)"""
+        with self._read() as cursor:
+            cursor.execute(f'''
+                SELECT * FROM orders WHERE user_id = ?
+                UNION ALL
+                SELECT {ARCHIVED_ORDER_COLUMNS} FROM orders_archive WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+            ''', (user_id, user_id))
+            
+            rows = cursor.fetchall()
         
         return [dict(row) for row in rows]
     
+    @reader
     def get_all_orders(self, status: str = None) -> List[Dict]:
         """Получить все заказы"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        if status:
-            cursor.execute('''
-                SELECT * FROM orders 
-                WHERE status = ? 
-                ORDER BY created_at DESC
-            ''', (status,))
-        else:
-            cursor.execute('SELECT * FROM orders ORDER BY created_at DESC')
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with self._read() as cursor:
+            if status:
+                cursor.execute('''
+                    SELECT * FROM orders 
+                    WHERE status = ? 
+                    ORDER BY created_at DESC, id DESC
+                ''', (status,))
+            else:
+                cursor.execute('SELECT * FROM orders ORDER BY created_at DESC, id DESC')
+            
+            rows = cursor.fetchall()
         
         return [dict(row) for row in rows]
     
     def update_order_status(self, order_id: int, new_status: str, 
-                          admin_id: int, comment: str = None):
-        """Обновить статус заказа"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Получаем старый статус
-        cursor.execute('SELECT status FROM orders WHERE id = ?', (order_id,))
-        old_status = cursor.fetchone()[0]
-        
-        # Обновляем статус
-        cursor.execute('''
-            UPDATE orders 
-            SET status = ?, 
-                updated_at = CURRENT_TIMESTAMP,
-                admin_comment = ?
-            WHERE id = ?
-        ''', (new_status, comment, order_id))
-        
-        # Если завершён - ставим дату
-        if new_status == 'completed':
+                          admin_id: int, comment: str = None) -> Optional[Dict]:
+        """Обновить статус заказа
+        
+        Проверка перехода, запись в историю и обновление заказа выполняются
+        в одной транзакции. Возвращает обновлённый заказ или None, если
+        заказа нет; при недопустимом переходе - InvalidStatusTransition.
+        """
+        sources = STATUS_SOURCES.get(new_status)
+        if not sources:
+            raise InvalidStatusTransition(order_id, None, new_status)
+        
+        placeholders = ', '.join('?' * len(sources))
+        
+        with self._write() as cursor:
+            # Архивный заказ при смене статуса возвращается в работу
+            self._restore_order(cursor, order_id)
+            
+            # История пишется только если переход из текущего статуса допустим
+            cursor.execute(f'''
+                INSERT INTO order_history 
+                (order_id, old_status, new_status, comment, changed_by)
+                SELECT id, status, ?, ?, ? FROM orders
+                WHERE id = ? AND status IN ({placeholders})
+                RETURNING old_status
+            ''', (new_status, comment, admin_id, order_id, *sources))
+            row = cursor.fetchone()
+            
+            if row is None:
+                cursor.execute('SELECT status FROM orders WHERE id = ?', (order_id,))
+                current = cursor.fetchone()
+                if current is None:
+                    return None
+                raise InvalidStatusTransition(order_id, current[0], new_status)
+            
+            old_status = row[0]
+            
             cursor.execute('''
                 UPDATE orders 
-                SET completed_at = CURRENT_TIMESTAMP 
+                SET status = ?, 
+                    updated_at = CURRENT_TIMESTAMP,
+                    admin_comment = ?,
+                    completed_at = CASE WHEN ? = 'completed'
+                                        THEN CURRENT_TIMESTAMP
+                                        ELSE completed_at END
                 WHERE id = ?
-            ''', (order_id,))
+                RETURNING *
+            ''', (new_status, comment, new_status, order_id))
+            order = dict(cursor.fetchone())
+            
+            self._bump(cursor, {
+                f'orders:status:{old_status}': -1,
+                f'orders:status:{new_status}': 1
+            })
+            self._rollup(cursor, [('status', order['tariff'] or '', new_status, 1)])
         
-        # Добавляем в историю
-        cursor.execute('''
-            INSERT INTO order_history 
-            (order_id, old_status, new_status, comment, changed_by)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (order_id, old_status, new_status, comment, admin_id))
-        
-        conn.commit()
-        conn.close()
+        self._cache_order(order)
+        return dict(order)
     
+    @reader
     def get_order_history(self, order_id: int) -> List[Dict]:
         """Получить историю заказа"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM order_history 
-            WHERE order_id = ? 
-            ORDER BY created_at DESC
-        ''', (order_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT * FROM order_history 
+                WHERE order_id = ? 
+                ORDER BY created_at DESC, id DESC
+            ''', (order_id,))
+            
+            rows = cursor.fetchall()
+            if not rows:
+                cursor.execute(f'''
+                    SELECT {ARCHIVED_HISTORY_COLUMNS} FROM order_history_archive
+                    WHERE order_id = ?
+                    ORDER BY created_at DESC, id DESC
+                ''', (order_id,))
+                rows = cursor.fetchall()
         
         return [dict(row) for row in rows]
     
@@ -297,137 +592,873 @@ class Database:
     def add_message(self, order_id: int, user_id: int, message: str, 
                 is_admin: bool = False, admin_id: int = None):
         """Добавить сообщение"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO messages 
-            (order_id, user_id, message, is_admin, admin_id)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (order_id, user_id, message, 1 if is_admin else 0, admin_id))
-        
-        message_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._write() as cursor:
+            # Новая переписка по архивному заказу возвращает его в работу
+            self._restore_order(cursor, order_id)
+            
+            cursor.execute('''
+                INSERT INTO messages 
+                (order_id, user_id, message, is_admin, admin_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (order_id, user_id, message, 1 if is_admin else 0, admin_id))
+            
+            message_id = cursor.lastrowid
+            
+            cursor.execute('SELECT tariff FROM orders WHERE id = ?', (order_id,))
+            order = cursor.fetchone()
+            self._rollup(cursor, [('messages', (order and order[0]) or '', '', 1)])
         
         return message_id
-
+    
+    @reader
     def get_order_messages(self, order_id: int, limit: int = 20):
         """Получить сообщения по заказу"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM messages
-            WHERE order_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (order_id, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT * FROM messages
+                WHERE order_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (order_id, limit))
+            
+            rows = cursor.fetchall()
+            if not rows:
+                cursor.execute(f'''
+                    SELECT {ARCHIVED_MESSAGE_COLUMNS} FROM messages_archive
+                    WHERE order_id = ?
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ?
+                ''', (order_id, limit))
+                rows = cursor.fetchall()
         
         return [dict(row) for row in rows]
-
+    
+    @reader
     def get_last_message(self, order_id: int):
         """Получить последнее сообщение по заказу"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        messages = self.get_order_messages(order_id, limit=1)
+        return messages[0] if messages else None
+    
+    # ========== ПОСТРАНИЧНЫЕ ВЫБОРКИ ==========
+    
+    def _keyset_page(self, query: str, params: tuple, after: Optional[tuple],
+                     limit: int, key: str = 'id') -> Tuple[List[Dict], Optional[tuple]]:
+        """Страница выборки от новых к старым по ключу (created_at, key).
+        
+        after - курсор последней строки предыдущей страницы. Возвращает
+        строки страницы и курсор следующей (None, если страница последняя).
+        """
+        if after is not None:
+            query += f' AND (created_at, {key}) < (?, ?)'
+            params = (*params, *after)
+        query += f' ORDER BY created_at DESC, {key} DESC LIMIT ?'
+        
+        with self._read() as cursor:
+            cursor.execute(query, (*params, limit + 1))
+            rows = [dict(row) for row in cursor.fetchall()]
+        
+        if len(rows) <= limit:
+            return rows, None
+        
+        rows = rows[:limit]
+        return rows, (rows[-1]['created_at'], rows[-1][key])
+    
+    @reader
+    def get_orders_page(self, status: str = None, after: tuple = None,
+                        limit: int = 20) -> Tuple[List[Dict], Optional[tuple]]:
+        """Страница всех заказов (или заказов с указанным статусом)"""
+        if status:
+            return self._keyset_page(
+                'SELECT * FROM orders WHERE status = ?', (status,), after, limit
+            )
+        return self._keyset_page('SELECT * FROM orders WHERE 1', (), after, limit)
+    
+    @reader
+    def get_user_orders_page(self, user_id: int, after: tuple = None,
+                             limit: int = 10) -> Tuple[List[Dict], Optional[tuple]]:
+        """Страница заказов пользователя (включая архивные)"""
+        return self._keyset_page(
+            f'''SELECT * FROM (
+                SELECT * FROM orders WHERE user_id = ?
+                UNION ALL
+                SELECT {ARCHIVED_ORDER_COLUMNS} FROM orders_archive WHERE user_id = ?
+            ) WHERE 1''', (user_id, user_id), after, limit
+        )
+    
+    @reader
+    def get_latest_user_order(self, user_id: int) -> Optional[Dict]:
+        """Последний заказ пользователя"""
+        orders, _ = self.get_user_orders_page(user_id, limit=1)
+        return orders[0] if orders else None
+    
+    @reader
+    def get_users_page(self, after: tuple = None,
+                       limit: int = 15) -> Tuple[List[Dict], Optional[tuple]]:
+        """Страница пользователей"""
+        return self._keyset_page(
+            'SELECT * FROM users WHERE 1', (), after, limit, key='user_id'
+        )
+    
+    @reader
+    def get_order_messages_page(self, order_id: int, after: tuple = None,
+                                limit: int = 20) -> Tuple[List[Dict], Optional[tuple]]:
+        """Страница сообщений по заказу"""
+        page = self._keyset_page(
+            'SELECT * FROM messages WHERE order_id = ?', (order_id,), after, limit
+        )
+        if page[0]:
+            return page
         
-        cursor.execute('''
-            SELECT * FROM messages
-            WHERE order_id = ?
-            ORDER BY created_at DESC
-            LIMIT 1
+        # Заказ целиком в архиве (или сообщений нет вовсе)
+        return self._keyset_page(
+            f'SELECT {ARCHIVED_MESSAGE_COLUMNS} FROM messages_archive WHERE order_id = ?',
+            (order_id,), after, limit
+        )
+    
+    # ========== АРХИВ ==========
+    
+    def archive_orders(self, days: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """Перенести в архив завершённые и отменённые заказы без изменений
+        дольше days дней вместе с перепиской и историей.
+        
+        Переносим пачками по batch_size заказов, каждая - отдельная
+        транзакция, чтобы не держать запись надолго. Возвращает число
+        перенесённых заказов.
+        """
+        placeholders = ', '.join('?' * len(ARCHIVE_STATUSES))
+        total = 0
+        
+        while True:
+            with self._write() as cursor:
+                cursor.execute(f'''
+                    SELECT id FROM orders
+                    WHERE status IN ({placeholders})
+                      AND updated_at < DATETIME('now', ?)
+                    LIMIT ?
+                ''', (*ARCHIVE_STATUSES, f'-{int(days)} days', batch_size))
+                ids = json.dumps([row[0] for row in cursor.fetchall()])
+                
+                cursor.execute('''
+                    INSERT INTO orders_archive (
+                        id, user_id, order_number, name, contact, tariff,
+                        description, budget, status, admin_comment,
+                        created_at, updated_at, completed_at
+                    )
+                    SELECT id, user_id, order_number, name, contact, tariff,
+                           zpack(description), budget, status, zpack(admin_comment),
+                           created_at, updated_at, completed_at
+                    FROM orders WHERE id IN (SELECT value FROM json_each(?))
+                ''', (ids,))
+                moved = cursor.rowcount
+                if not moved:
+                    break
+                
+                cursor.execute('''
+                    INSERT INTO messages_archive
+                    SELECT id, order_id, user_id, is_admin, admin_id,
+                           zpack(message), created_at
+                    FROM messages WHERE order_id IN (SELECT value FROM json_each(?))
+                ''', (ids,))
+                cursor.execute('''
+                    INSERT INTO order_history_archive
+                    SELECT id, order_id, old_status, new_status, zpack(comment),
+                           changed_by, created_at
+                    FROM order_history WHERE order_id IN (SELECT value FROM json_each(?))
+                ''', (ids,))
+                
+                for table in ('messages', 'order_history'):
+                    cursor.execute(
+                        f'DELETE FROM {table} WHERE order_id IN (SELECT value FROM json_each(?))',
+                        (ids,)
+                    )
+                cursor.execute(
+                    'DELETE FROM orders WHERE id IN (SELECT value FROM json_each(?))',
+                    (ids,)
+                )
+            
+            total += moved
+            if moved < batch_size:
+                break
+        
+        if total:
+            self.invalidate_order()
+        return total
+    
+    @staticmethod
+    def _restore_order(cursor, order_id: int) -> bool:
+        """Вернуть заказ из архива в рабочие таблицы (в текущей транзакции).
+        
+        updated_at сдвигается на текущее время - иначе ночная архивация
+        сразу же вернула бы заказ в архив.
+        """
+        cursor.execute(f'''
+            INSERT INTO orders (
+                id, user_id, order_number, name, contact, tariff,
+                description, budget, status, admin_comment,
+                created_at, updated_at, completed_at
+            )
+            SELECT {ARCHIVED_ORDER_COLUMNS} FROM orders_archive WHERE id = ?
         ''', (order_id,))
+        if not cursor.rowcount:
+            return False
+        cursor.execute(
+            'UPDATE orders SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (order_id,)
+        )
         
-        row = cursor.fetchone()
-        conn.close()
+        cursor.execute(f'''
+            INSERT INTO messages
+            SELECT {ARCHIVED_MESSAGE_COLUMNS} FROM messages_archive WHERE order_id = ?
+        ''', (order_id,))
+        cursor.execute(f'''
+            INSERT INTO order_history
+            SELECT {ARCHIVED_HISTORY_COLUMNS} FROM order_history_archive WHERE order_id = ?
+        ''', (order_id,))
+        for table in ('messages_archive', 'order_history_archive'):
+            cursor.execute(f'DELETE FROM {table} WHERE order_id = ?', (order_id,))
+        cursor.execute('DELETE FROM orders_archive WHERE id = ?', (order_id,))
+        return True
+    
+    # ========== ПОИСК ==========
+    
+    @staticmethod
+    def _fts_query(text: str) -> Optional[str]:
+        """Запрос FTS5 из текста администратора: все слова, каждое как префикс.
         
-        return dict(row) if row else None
+        Слова берутся в кавычки, поэтому операторы FTS5 (AND, NEAR, "*", ":")
+        во вводе не интерпретируются. None, если слов нет.
+        """
+        words = re.findall(r'\w+', text)[:SEARCH_MAX_WORDS]
+        if not words:
+            return None
+        return ' '.join(f'"{word}"*' for word in words)
+    
+    @reader
+    def search(self, text: str, offset: int = 0,
+               limit: int = 10) -> Tuple[List[Dict], bool]:
+        """Поиск по заказам и переписке, лучшие совпадения первыми.
+        
+        Каждое совпадение - заказ или сообщение с полями заказа и
+        фрагментом текста (snippet), найденные слова в нём обрамлены
+        SNIPPET_MARKS. Возвращает (совпадения, есть ли следующая страница).
+        """
+        match = self._fts_query(text)
+        if match is None:
+            return [], False
+        
+        open_mark, close_mark = SNIPPET_MARKS
+        with self._read() as cursor:
+            # bm25: номер заказа и имя весят больше описания
+            cursor.execute('''
+                SELECT 'order' AS kind, o.id AS order_id, NULL AS message_id,
+                       o.order_number, o.name, o.status, o.created_at,
+                       snippet(orders_fts, -1, :open, :close, '…', 12) AS snippet,
+                       bm25(orders_fts, 10.0, 5.0, 5.0, 1.0) AS rank
+                FROM orders_fts JOIN orders o ON o.id = orders_fts.rowid
+                WHERE orders_fts MATCH :match
+                UNION ALL
+                SELECT 'message', o.id, m.id,
+                       o.order_number, o.name, o.status, m.created_at,
+                       snippet(messages_fts, 0, :open, :close, '…', 12),
+                       bm25(messages_fts)
+                FROM messages_fts
+                JOIN messages m ON m.id = messages_fts.rowid
+                JOIN orders o ON o.id = m.order_id
+                WHERE messages_fts MATCH :match
+                ORDER BY rank, order_id DESC, message_id
+                LIMIT :limit OFFSET :offset
+            ''', {
+                'match': match, 'open': open_mark, 'close': close_mark,
+                'limit': limit + 1, 'offset': offset
+            })
+            rows = [dict(row) for row in cursor.fetchall()]
+        
+        return rows[:limit], len(rows) > limit
     
     # ========== СТАТИСТИКА ==========
     
+    @staticmethod
+    def _today() -> str:
+        """Текущая дата в UTC, как DATE('now') в SQLite"""
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    
+    @staticmethod
+    def _bump(cursor, changes: Dict[str, int]):
+        """Изменить счётчики в рамках текущей транзакции"""
+        cursor.executemany('''
+            INSERT INTO counters (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        ''', changes.items())
+    
+    @classmethod
+    def _rollup(cls, cursor, changes: List[Tuple[str, str, str, int]]):
+        """Добавить к дневным агрегатам за сегодня: (метрика, тариф, статус, сколько)"""
+        today = cls._today()
+        cursor.executemany('''
+            INSERT INTO daily_rollups (day, metric, tariff, status, value)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(day, metric, tariff, status)
+            DO UPDATE SET value = value + excluded.value
+        ''', [(today, *change) for change in changes])
+    
+    @reader
     def get_statistics(self) -> Dict:
-        """Получить статистику"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # Всего пользователей
-        cursor.execute('SELECT COUNT(*) FROM users')
-        stats['total_users'] = cursor.fetchone()[0]
-        
-        # Всего заказов
-        cursor.execute('SELECT COUNT(*) FROM orders')
-        stats['total_orders'] = cursor.fetchone()[0]
-        
-        # Заказы по статусам
-        cursor.execute('''
-            SELECT status, COUNT(*) as count 
-            FROM orders 
-            GROUP BY status
-        ''')
-        stats['orders_by_status'] = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Заказы за сегодня
-        cursor.execute('''
-            SELECT COUNT(*) FROM orders 
-            WHERE DATE(created_at) = DATE('now')
-        ''')
-        stats['orders_today'] = cursor.fetchone()[0]
-        
-        # Новые пользователи за неделю
-        cursor.execute('''
-            SELECT COUNT(*) FROM users 
-            WHERE created_at >= datetime('now', '-7 days')
-        ''')
-        stats['new_users_week'] = cursor.fetchone()[0]
-        
-        conn.close()
-        return stats
+        """Получить статистику (одним запросом к таблице счётчиков)"""
+        today = datetime.now(timezone.utc).date()
+        week = [(today - timedelta(days=days)).isoformat() for days in range(7)]
+        
+        names = ['users', 'orders', f'orders:day:{today.isoformat()}']
+        names += [f'users:day:{day}' for day in week]
+        names += [f'orders:status:{status}' for status in ORDER_STATUSES]
+        
+        with self._read() as cursor:
+            cursor.execute(
+                f'SELECT name, value FROM counters '
+                f'WHERE name IN ({", ".join("?" * len(names))})',
+                names
+            )
+            values = {row['name']: row['value'] for row in cursor.fetchall()}
+        
+        return {
+            'total_users': values.get('users', 0),
+            'total_orders': values.get('orders', 0),
+            'orders_by_status': {
+                status: values[f'orders:status:{status}']
+                for status in ORDER_STATUSES
+                if values.get(f'orders:status:{status}')
+            },
+            'orders_today': values.get(f'orders:day:{today.isoformat()}', 0),
+            'new_users_week': sum(values.get(f'users:day:{day}', 0) for day in week)
+        }
+    
+    def rebuild_counters(self) -> Dict:
+        """Пересчитать счётчики с нуля по таблицам заказов (с архивом) и пользователей"""
+        with self._write() as cursor:
+            cursor.execute('DELETE FROM counters')
+            # Архивные заказы учитываются наравне с рабочими
+            cursor.execute('''
+                WITH all_orders AS (
+                    SELECT status, created_at FROM orders
+                    UNION ALL
+                    SELECT status, created_at FROM orders_archive
+                )
+                INSERT INTO counters (name, value)
+                SELECT 'users', COUNT(*) FROM users
+                UNION ALL
+                SELECT 'orders', COUNT(*) FROM all_orders
+                UNION ALL
+                SELECT 'orders:status:' || status, COUNT(*) FROM all_orders
+                WHERE status IS NOT NULL GROUP BY status
+                UNION ALL
+                SELECT 'orders:day:' || DATE(created_at), COUNT(*) FROM all_orders
+                WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+                UNION ALL
+                SELECT 'users:day:' || DATE(created_at), COUNT(*) FROM users
+                WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+            ''')
+        
+        return self.get_statistics()
+    
+    @reader
+    def get_trends(self, days: int) -> Dict:
+        """Динамика за последние days дней в сравнении с предыдущими days.
+        
+        Читаются только дневные агрегаты, поэтому время не зависит от
+        размера таблиц заказов и пользователей. Метрики: orders, completed,
+        cancelled, users, messages; daily - по дням от старых к новым,
+        by_tariff - разбивка заказов, завершений и отмен по тарифам.
+        """
+        today = datetime.now(timezone.utc).date()
+        start = today - timedelta(days=days - 1)
+        previous_start = start - timedelta(days=days)
+        
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT day, metric, tariff, status, value FROM daily_rollups
+                WHERE day >= ? AND (metric != 'status' OR status IN ('completed', 'cancelled'))
+            ''', (previous_start.isoformat(),))
+            rows = cursor.fetchall()
+        
+        metrics = ('orders', 'completed', 'cancelled', 'users', 'messages')
+        current = dict.fromkeys(metrics, 0)
+        previous = dict.fromkeys(metrics, 0)
+        daily = {metric: [0] * days for metric in metrics}
+        by_tariff: Dict[str, Dict[str, int]] = {}
+        
+        for day, metric, tariff, status, value in rows:
+            if metric == 'status':
+                metric = status
+            offset = (date.fromisoformat(day) - start).days
+            if offset < 0:
+                previous[metric] += value
+                continue
+            
+            current[metric] += value
+            daily[metric][offset] += value
+            if tariff and metric in ('orders', 'completed', 'cancelled'):
+                counts = by_tariff.setdefault(tariff, {'orders': 0, 'completed': 0, 'cancelled': 0})
+                counts[metric] += value
+        
+        return {
+            'days': days,
+            'start': start.isoformat(),
+            'current': current,
+            'previous': previous,
+            'daily': daily,
+            'by_tariff': by_tariff
+        }
+    
+    def rebuild_rollups(self) -> int:
+        """Пересчитать дневные агрегаты с нуля (с учётом архива); число строк"""
+        with self._write() as cursor:
+            cursor.execute('DELETE FROM daily_rollups')
+            cursor.execute('''
+                WITH all_orders AS (
+                    SELECT id, tariff, created_at FROM orders
+                    UNION ALL
+                    SELECT id, tariff, created_at FROM orders_archive
+                ),
+                all_history AS (
+                    SELECT order_id, new_status, created_at FROM order_history
+                    WHERE old_status IS NOT NULL
+                    UNION ALL
+                    SELECT order_id, new_status, created_at FROM order_history_archive
+                    WHERE old_status IS NOT NULL
+                ),
+                all_messages AS (
+                    SELECT order_id, created_at FROM messages
+                    UNION ALL
+                    SELECT order_id, created_at FROM messages_archive
+                )
+                INSERT INTO daily_rollups (day, metric, tariff, status, value)
+                SELECT DATE(created_at), 'orders', COALESCE(tariff, ''), '', COUNT(*)
+                FROM all_orders WHERE created_at IS NOT NULL
+                GROUP BY 1, 3
+                UNION ALL
+                SELECT DATE(h.created_at), 'status', COALESCE(o.tariff, ''), h.new_status, COUNT(*)
+                FROM all_history h LEFT JOIN all_orders o ON o.id = h.order_id
+                WHERE h.created_at IS NOT NULL AND h.new_status IS NOT NULL
+                GROUP BY 1, 3, 4
+                UNION ALL
+                SELECT DATE(created_at), 'users', '', '', COUNT(*)
+                FROM users WHERE created_at IS NOT NULL
+                GROUP BY 1
+                UNION ALL
+                SELECT DATE(m.created_at), 'messages', COALESCE(o.tariff, ''), '', COUNT(*)
+                FROM all_messages m LEFT JOIN all_orders o ON o.id = m.order_id
+                WHERE m.created_at IS NOT NULL
+                GROUP BY 1, 3
+            ''')
+            # rowcount для запроса с WITH недоступен
+            cursor.execute('SELECT COUNT(*) FROM daily_rollups')
+            return cursor.fetchone()[0]
+    
+    # ========== СОБЫТИЯ ==========
+    
+    # Примерные накладные расходы на событие в буфере (кортеж, float, строки)
+    EVENT_OVERHEAD = 120
+    
+    def record_event(self, event_type: str, data: Dict = None) -> bool:
+        """Запомнить событие для таблицы statistics без записи в БД.
+        
+        data кодируется компактным JSON. Если буфер превысил
+        EVENTS_BUFFER_BYTES, событие отбрасывается и учитывается в счётчике
+        (в БД попадёт событие events_dropped). Возвращает True, если буфер
+        пора сбросить.
+        """
+        encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':')) if data else None
+        size = self.EVENT_OVERHEAD + len(event_type) + (len(encoded) if encoded else 0)
+        
+        with self._events_lock:
+            if self._events_bytes + size > EVENTS_BUFFER_BYTES:
+                self._events_dropped += 1
+                return True
+            self._events.append((event_type, encoded, time.time()))
+            self._events_bytes += size
+            return len(self._events) >= EVENTS_FLUSH_SIZE
+    
+    def flush_events(self) -> int:
+        """Записать накопленные события одним executemany"""
+        with self._events_lock:
+            pending, self._events = self._events, []
+            self._events_bytes = 0
+            dropped, self._events_dropped = self._events_dropped, 0
+        
+        if dropped:
+            pending.append(('events_dropped', f'{{"n":{dropped}}}', time.time()))
+        if not pending:
+            return 0
+        
+        rows = [
+            (event_type, data, datetime.fromtimestamp(at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+            for event_type, data, at in pending
+        ]
+        try:
+            with self._write() as cursor:
+                cursor.executemany(
+                    'INSERT INTO statistics (event_type, event_data, created_at) VALUES (?, ?, ?)',
+                    rows
+                )
+        except Exception:
+            # Повторно не пишем, чтобы не копить буфер при проблемах с БД:
+            # события пачки считаются отброшенными
+            with self._events_lock:
+                self._events_dropped += len(rows) - (1 if dropped else 0) + dropped
+            raise
+        
+        with self._events_lock:
+            self._events_written += len(rows)
+            self._events_dropped_total += dropped
+        return len(rows)
+    
+    def event_stats(self) -> Dict:
+        """Состояние буфера событий"""
+        with self._events_lock:
+            return {
+                'buffered': len(self._events),
+                'buffer_bytes': self._events_bytes,
+                'written': self._events_written,
+                'dropped': self._events_dropped_total + self._events_dropped
+            }
+    
+    # ========== ОЧЕРЕДЬ ИСХОДЯЩИХ ==========
+    
+    def enqueue_messages(self, messages: List[Tuple]) -> List[int]:
+        """Поставить сообщения в очередь.
+        
+        Элементы: (chat_id, text, options JSON, priority[, edit_message_id]);
+        с edit_message_id вместо отправки редактируется это сообщение.
+        """
+        ids = []
+        with self._write() as cursor:
+            for chat_id, text, options, priority, *edit in messages:
+                cursor.execute('''
+                    INSERT INTO outbox (chat_id, text, options, priority, edit_message_id)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (chat_id, text, options, priority, edit[0] if edit else None))
+                ids.append(cursor.lastrowid)
+        
+        return ids
+    
+    def revise_outbox(self, outbox_ids: List[int], text: str,
+                      options: Optional[str]) -> List[Dict]:
+        """Заменить текст ещё не отправленных сообщений и вернуть
+        состояние всех указанных (id, chat_id, status, message_id)"""
+        placeholders = ', '.join('?' * len(outbox_ids))
+        with self._write() as cursor:
+            cursor.execute(f'''
+                UPDATE outbox SET text = ?, options = ?
+                WHERE status = 'pending' AND id IN ({placeholders})
+            ''', (text, options, *outbox_ids))
+            cursor.execute(f'''
+                SELECT id, chat_id, status, message_id FROM outbox
+                WHERE id IN ({placeholders})
+            ''', outbox_ids)
+            rows = cursor.fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    def claim_outbox(self, limit: int) -> List[Dict]:
+        """Забрать пачку готовых к отправке сообщений (статус sending)"""
+        with self._write() as cursor:
+            cursor.execute('''
+                UPDATE outbox
+                SET status = 'sending', attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM outbox
+                    WHERE status = 'pending' AND next_attempt_at <= ?
+                    ORDER BY priority, next_attempt_at, id
+                    LIMIT ?
+                )
+                RETURNING *
+            ''', (time.time(), limit))
+            
+            rows = cursor.fetchall()
+        
+        # Порядок строк из RETURNING не гарантирован
+        return sorted((dict(row) for row in rows),
+                      key=lambda m: (m['priority'], m['next_attempt_at'], m['id']))
+    
+    def complete_outbox(self, sent: List[Tuple[int, int]] = (),
+                        retry: List[Tuple[float, str, int]] = (),
+                        failed: List[Tuple[str, int]] = ()):
+        """Записать итоги отправки пачки.
+        
+        sent - (message_id, id), retry - (время следующей попытки, ошибка, id),
+        failed - (ошибка, id).
+        """
+        with self._write() as cursor:
+            cursor.executemany('''
+                UPDATE outbox
+                SET status = 'sent', message_id = ?, error = NULL,
+                    sent_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', sent)
+            cursor.executemany('''
+                UPDATE outbox
+                SET status = 'pending', next_attempt_at = ?, error = ?
+                WHERE id = ?
+            ''', retry)
+            cursor.executemany('''
+                UPDATE outbox
+                SET status = 'failed', error = ?, sent_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', failed)
+    
+    @reader
+    def next_outbox_due(self) -> Optional[float]:
+        """Время ближайшей отложенной отправки (None, если очередь пуста)"""
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'
+            ''')
+            return cursor.fetchone()[0]
+    
+    def recover_outbox(self) -> int:
+        """Разобрать сообщения, прерванные остановкой бота посреди отправки.
+        
+        Доставлено ли такое сообщение, неизвестно; чтобы не отправить его
+        дважды, повторно оно не отправляется и помечается failed.
+        """
+        with self._write() as cursor:
+            cursor.execute('''
+                UPDATE outbox
+                SET status = 'failed', error = 'interrupted',
+                    sent_at = CURRENT_TIMESTAMP
+                WHERE status = 'sending'
+            ''')
+            return cursor.rowcount
+    
+    def purge_outbox(self, days: int) -> int:
+        """Удалить отправленные и неудачные сообщения старше days дней"""
+        with self._write() as cursor:
+            cursor.execute('''
+                DELETE FROM outbox
+                WHERE status IN ('sent', 'failed')
+                  AND sent_at < DATETIME('now', ?)
+            ''', (f'-{int(days)} days',))
+            return cursor.rowcount
+    
+    # ========== СОСТОЯНИЕ БОТА (PERSISTENCE) ==========
+    
+    @reader
+    def load_persistence(self, kind: str) -> Dict[str, bytes]:
+        """Все записи одного вида: key -> сериализованные данные"""
+        with self._read() as cursor:
+            cursor.execute(
+                'SELECT key, data FROM persistence WHERE kind = ?', (kind,)
+            )
+            return {row['key']: row['data'] for row in cursor.fetchall()}
+    
+    def save_persistence(self, upserts: List[Tuple[str, str, bytes]],
+                         deletes: List[Tuple[str, str]]):
+        """Записать пачку изменений одной транзакцией"""
+        with self._write() as cursor:
+            cursor.executemany('''
+                INSERT INTO persistence (kind, key, data) VALUES (?, ?, ?)
+                ON CONFLICT (kind, key) DO UPDATE
+                SET data = excluded.data, updated_at = CURRENT_TIMESTAMP
+            ''', upserts)
+            cursor.executemany(
+                'DELETE FROM persistence WHERE kind = ? AND key = ?', deletes
+            )
+    
+    # ========== РАССЫЛКИ ==========
+    
+    def create_broadcast(self, text: str, created_by: int) -> int:
+        """Создать черновик рассылки"""
+        with self._write() as cursor:
+            cursor.execute('''
+                INSERT INTO broadcasts (text, created_by, total)
+                SELECT ?, ?, COUNT(*) FROM users WHERE is_blocked = 0
+            ''', (text, created_by))
+            return cursor.lastrowid
+    
+    @reader
+    def get_broadcast(self, broadcast_id: int) -> Optional[Dict]:
+        """Получить рассылку"""
+        with self._read() as cursor:
+            cursor.execute('SELECT * FROM broadcasts WHERE id = ?', (broadcast_id,))
+            row = cursor.fetchone()
+        
+        return dict(row) if row else None
+    
+    @reader
+    def get_running_broadcasts(self) -> List[Dict]:
+        """Незавершённые рассылки (для продолжения после перезапуска)"""
+        with self._read() as cursor:
+            cursor.execute("SELECT * FROM broadcasts WHERE status = 'running' ORDER BY id")
+            rows = cursor.fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    def start_broadcast(self, broadcast_id: int, chat_id: int,
+                        message_id: int) -> Optional[Dict]:
+        """Запустить черновик; None, если рассылка уже не черновик"""
+        with self._write() as cursor:
+            cursor.execute('''
+                UPDATE broadcasts
+                SET status = 'running', progress_chat_id = ?, progress_message_id = ?
+                WHERE id = ? AND status = 'draft'
+                RETURNING *
+            ''', (chat_id, message_id, broadcast_id))
+            row = cursor.fetchone()
+        
+        return dict(row) if row else None
+    
+    def finish_broadcast(self, broadcast_id: int, status: str) -> Optional[Dict]:
+        """Завершить рассылку со статусом done или cancelled"""
+        with self._write() as cursor:
+            cursor.execute('''
+                UPDATE broadcasts
+                SET status = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status IN ('draft', 'running')
+                RETURNING *
+            ''', (status, broadcast_id))
+            row = cursor.fetchone()
+        
+        return dict(row) if row else None
+    
+    @reader
+    def get_broadcast_recipients(self, after_user_id: int, limit: int) -> List[int]:
+        """Следующая пачка получателей по возрастанию user_id"""
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT user_id FROM users
+                WHERE user_id > ? AND is_blocked = 0
+                ORDER BY user_id
+                LIMIT ?
+            ''', (after_user_id, limit))
+            return [row[0] for row in cursor.fetchall()]
+    
+    def checkpoint_broadcast(self, broadcast_id: int, last_user_id: int,
+                             sent: int, failed: int,
+                             blocked_user_ids: List[int]) -> Dict:
+        """Записать итоги пачки и отметить заблокировавших бота"""
+        with self._write() as cursor:
+            cursor.executemany(
+                'UPDATE users SET is_blocked = 1 WHERE user_id = ?',
+                [(user_id,) for user_id in blocked_user_ids]
+            )
+            cursor.execute('''
+                UPDATE broadcasts
+                SET last_user_id = ?, sent = sent + ?, failed = failed + ?,
+                    blocked = blocked + ?
+                WHERE id = ?
+                RETURNING *
+            ''', (last_user_id, sent, failed, len(blocked_user_ids), broadcast_id))
+            return dict(cursor.fetchone())
     
     # ========== ОТЗЫВЫ ==========
     
     def add_review(self, user_id: int, order_id: int, 
                    rating: int, text: str) -> int:
         """Добавить отзыв"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO reviews (user_id, order_id, rating, text)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, order_id, rating, text))
-        
-        review_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._write() as cursor:
+            cursor.execute('''
+                INSERT INTO reviews (user_id, order_id, rating, text)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, order_id, rating, text))
+            
+            review_id = cursor.lastrowid
         
         return review_id
     
+    @reader
     def get_published_reviews(self, limit: int = 10) -> List[Dict]:
         """Получить опубликованные отзывы"""
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT r.*, u.first_name, u.username 
+                FROM reviews r
+                JOIN users u ON r.user_id = u.user_id
+                WHERE r.is_published = 1
+                ORDER BY r.created_at DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            rows = cursor.fetchall()
         
-        cursor.execute('''
-            SELECT r.*, u.first_name, u.username 
-            FROM reviews r
-            JOIN users u ON r.user_id = u.user_id
-            WHERE r.is_published = 1
-            ORDER BY r.created_at DESC
-            LIMIT ?
-        ''', (limit,))
+        return [dict(row) for row in rows]
+
+class AsyncDatabase:
+    """Асинхронный фасад над Database.
+    
+    Любой публичный метод Database доступен как корутина, цикл событий не
+    блокируется. Методы с @reader выполняются в потоках читателей (по
+    одному на соединение пула), остальные - в потоке писателя, так что
+    чтения не ждут в очереди за записью. Количество ожидающих запросов
+    ограничено DB_QUEUE_SIZE.
+    """
+    
+    def __init__(self, database: Database, queue_size: int = DB_QUEUE_SIZE):
+        self.sync = database
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+        self._read_executor = ThreadPoolExecutor(
+            max_workers=database.read_pool_size, thread_name_prefix='db-read'
+        )
+        self._queue_size = queue_size
+        self._slots = None
+        self._slots_loop = None
+        self._events_task = None
+    
+    def __getattr__(self, name):
+        method = getattr(self.sync, name)
+        if name.startswith('_') or not callable(method):
+            raise AttributeError(name)
         
-        rows = cursor.fetchall()
-        conn.close()
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
         
-        return [dict(row) for row in rows]
+        # Кэшируем обёртку, чтобы не создавать её на каждый вызов
+        setattr(self, name, wrapper)
+        return wrapper
+    
+    async def touch_user(self, *args, **kwargs):
+        """Отметить активность (в памяти); при заполнении буфера - сбросить его"""
+        if self.sync.touch_user(*args, **kwargs):
+            await self.flush_activity()
+    
+    async def record_event(self, event_type: str, data: Dict = None):
+        """Запомнить событие (в памяти); полный буфер сбрасывается в фоне,
+        чтобы запись аналитики не задерживала обработку обновлений"""
+        if self.sync.record_event(event_type, data) and self._events_task is None:
+            self._events_task = asyncio.get_running_loop().create_task(self._flush_events())
+    
+    async def _flush_events(self):
+        try:
+            await self.flush_events()
+        except Exception as e:
+            logger.error(f"Ошибка записи событий: {e}")
+        finally:
+            self._events_task = None
+    
+    async def is_admin(self, user_id: int) -> bool:
+        """Проверка прав администратора; при свежем кэше - без похода в поток БД"""
+        admins = self.sync.cached_admin_ids()
+        if admins is None:
+            admins = await self.run(self.sync.refresh_admins)
+        return user_id in admins
+    
+    async def run(self, func, *args, **kwargs):
+        """Выполнить синхронную функцию в потоке БД (читателя для @reader)"""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self._queue_size)
+            self._slots_loop = loop
+        
+        executor = self._read_executor if getattr(func, 'reader', False) else self._executor
+        async with self._slots:
+            return await loop.run_in_executor(
+                executor, functools.partial(func, *args, **kwargs)
+            )
+    
+    def close(self):
+        """Дождаться выполнения очереди и закрыть БД"""
+        self._executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+        self.sync.close()
 
 # Создаём экземпляр БД
 db = Database()
+adb = AsyncDatabase(db)
@@ -1,8 +1,18 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from database import db
+from database import adb, InvalidStatusTransition, SNIPPET_MARKS
 from keyboards import kb
-from config import ORDER_STATUSES, ITEMS_PER_PAGE, ADMIN_IDS
+from utils.outbox import outbox
+from utils.broadcast import broadcaster, format_broadcast, broadcast_keyboard
+from utils.decorators import admin_only, track_step
+from config import (
+    ORDER_STATUSES, ITEMS_PER_PAGE, ADMIN_IDS,
+    ADMIN_ORDERS_PER_PAGE, ADMIN_USERS_PER_PAGE, MESSAGES_PER_PAGE,
+    SEARCH_RESULTS_PER_PAGE, TRENDS_PERIODS
+)
+from utils.helpers import (
+    parse_page, get_page_cursor, save_page_cursor, escape_html, create_sparkline
+)
 import logging
 from datetime import datetime
 
@@ -16,7 +26,7 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    stats = db.get_statistics()
+    stats = await adb.get_statistics()
     
     text = (
         "👨‍💼 <b>Панель администратора</b>\n\n"
@@ -35,7 +45,7 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if count > 0:
             text += f"{status_name}: {count}\n"
     
-    text += "\nВыберите действие:"
+    text += "\n🔎 Поиск заказа: /find текст\n\nВыберите действие:"
     
     await query.edit_message_text(
         text,
@@ -48,16 +58,23 @@ async def admin_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    orders = db.get_all_orders()
+    page, cursor = get_page_cursor(
+        context.user_data, 'admin_orders', parse_page(context.args)
+    )
+    orders, next_cursor = await adb.get_orders_page(
+        after=cursor, limit=ADMIN_ORDERS_PER_PAGE
+    )
+    save_page_cursor(context.user_data, 'admin_orders', page, next_cursor)
     
     if not orders:
         text = "📋 Заказов пока нет"
         keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data='admin_panel')]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
     else:
-        text = f"📋 <b>Все заказы ({len(orders)}):</b>\n\n"
+        text = f"📋 <b>Все заказы (стр. {page + 1}):</b>\n\n"
         
         keyboard = []
-        for order in orders[:20]:  # Показываем первые 20
+        for order in orders:
             status = ORDER_STATUSES.get(order['status'], order['status'])
             button_text = (
                 f"#{order['order_number']} | {status} | "
@@ -68,14 +85,16 @@ async def admin_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 callback_data=f"admin_order_{order['id']}"
             )])
         
-        keyboard.append([InlineKeyboardButton(
-            "◀️ Назад",
-            callback_data='admin_panel'
-        )])
+        reply_markup = kb.pagination(
+            page, None, 'admin_orders',
+            rows=keyboard,
+            has_next=next_cursor is not None,
+            back_callback='admin_panel'
+        )
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
@@ -84,13 +103,20 @@ async def admin_new_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    orders = db.get_all_orders(status='new')
+    page, cursor = get_page_cursor(
+        context.user_data, 'admin_new_orders', parse_page(context.args)
+    )
+    orders, next_cursor = await adb.get_orders_page(
+        status='new', after=cursor, limit=ADMIN_ORDERS_PER_PAGE
+    )
+    save_page_cursor(context.user_data, 'admin_new_orders', page, next_cursor)
     
     if not orders:
         text = "🆕 Новых заказов нет"
         keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data='admin_panel')]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
     else:
-        text = f"🆕 <b>Новые заказы ({len(orders)}):</b>\n\n"
+        text = f"🆕 <b>Новые заказы (стр. {page + 1}):</b>\n\n"
         
         keyboard = []
         for order in orders:
@@ -103,14 +129,16 @@ async def admin_new_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 callback_data=f"admin_order_{order['id']}"
             )])
         
-        keyboard.append([InlineKeyboardButton(
-            "◀️ Назад",
-            callback_data='admin_panel'
-        )])
+        reply_markup = kb.pagination(
+            page, None, 'admin_new_orders',
+            rows=keyboard,
+            has_next=next_cursor is not None,
+            back_callback='admin_panel'
+        )
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
@@ -119,15 +147,15 @@ async def admin_order_detail(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
         return
     
     # Получаем информацию о пользователе
-    user = db.get_user(order['user_id'])
+    user = await adb.get_user(order['user_id'])
     
     status = ORDER_STATUSES.get(order['status'], order['status'])
     
@@ -175,8 +203,8 @@ async def admin_change_status_menu(update: Update, context: ContextTypes.DEFAULT
     query = update.callback_query
     await query.answer()
     
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
@@ -193,19 +221,17 @@ async def admin_change_status_menu(update: Update, context: ContextTypes.DEFAULT
     
     await query.edit_message_text(
         text,
-        reply_markup=kb.status_selection(order_id),
+        reply_markup=kb.status_selection(order_id, order['status']),
         parse_mode='HTML'
     )
 
+@track_step('status', 'choose')
 async def admin_set_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Установка нового статуса"""
     query = update.callback_query
     await query.answer()
     
-    # Парсим данные: setstatus_ORDER_ID_STATUS
-    parts = query.data.split('_')
-    order_id = int(parts[1])
-    new_status = parts[2]
+    order_id, new_status = context.args
     
     # Запрашиваем комментарий
     context.user_data['pending_status_change'] = {
@@ -223,6 +249,7 @@ async def admin_set_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return ADMIN_COMMENT
 
+@track_step('status', 'comment')
 async def admin_save_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Сохранение статуса с комментарием"""
     comment = update.message.text.strip()
@@ -242,9 +269,13 @@ async def admin_save_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Обновляем статус
-        db.update_order_status(order_id, new_status, admin_id, comment)
+        order = await adb.update_order_status(order_id, new_status, admin_id, comment)
+        
+        if not order:
+            await update.message.reply_text("❌ Заказ не найден")
+            context.user_data.clear()
+            return ConversationHandler.END
         
-        order = db.get_order(order_id)
         # Получаем полное название статуса из словаря
         status_name = ORDER_STATUSES.get(new_status, new_status)
         
@@ -291,15 +322,22 @@ async def admin_save_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ]
         
         try:
-            await context.bot.send_message(
-                chat_id=order['user_id'],
-                text=user_text,
+            await outbox.send(
+                order['user_id'],
+                user_text,
                 reply_markup=InlineKeyboardMarkup(user_keyboard),
                 parse_mode='HTML'
             )
         except Exception as e:
             logger.error(f"Ошибка уведомления клиента: {e}")
         
+    except InvalidStatusTransition as e:
+        logger.warning(str(e))
+        await update.message.reply_text(
+            "❌ Нельзя перевести заказ из статуса "
+            f"{ORDER_STATUSES.get(e.old_status, e.old_status)} "
+            f"в {ORDER_STATUSES.get(e.new_status, e.new_status)}"
+        )
     except Exception as e:
         logger.error(f"Ошибка изменения статуса: {e}")
         await update.message.reply_text(
@@ -314,9 +352,9 @@ async def admin_order_history(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
     
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
-    history = db.get_order_history(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
+    history = await adb.get_order_history(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
@@ -359,11 +397,17 @@ async def admin_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    users = db.get_all_users()
+    page, cursor = get_page_cursor(
+        context.user_data, 'admin_users', parse_page(context.args)
+    )
+    users, next_cursor = await adb.get_users_page(
+        after=cursor, limit=ADMIN_USERS_PER_PAGE
+    )
+    save_page_cursor(context.user_data, 'admin_users', page, next_cursor)
     
-    text = f"👥 <b>Пользователи ({len(users)}):</b>\n\n"
+    text = f"👥 <b>Пользователи (стр. {page + 1}):</b>\n\n"
     
-    for user in users[:15]:  # Первые 15
+    for user in users:
         username = f"@{user['username']}" if user['username'] else "без username"
         text += (
             f"👤 {user['first_name'] or 'Имя не указано'}\n"
@@ -372,14 +416,13 @@ async def admin_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"   Регистрация: {user['created_at'][:10]}\n\n"
         )
     
-    keyboard = [[InlineKeyboardButton(
-        "◀️ Назад",
-        callback_data='admin_panel'
-    )]]
-    
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=kb.pagination(
+            page, None, 'admin_users',
+            has_next=next_cursor is not None,
+            back_callback='admin_panel'
+        ),
         parse_mode='HTML'
     )
 
@@ -388,7 +431,7 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    stats = db.get_statistics()
+    stats = await adb.get_statistics()
     
     text = (
         "📊 <b>Детальная статистика</b>\n\n"
@@ -408,6 +451,22 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         count = stats['orders_by_status'].get(status_key, 0)
         text += f"   {status_name}: {count}\n"
     
+    cache = await adb.order_cache_stats()
+    lookups = cache['hits'] + cache['misses']
+    hit_rate = cache['hits'] * 100 // lookups if lookups else 0
+    text += (
+        "\n🗄 <b>Кэш заказов:</b>\n"
+        f"   Записей: {cache['size']}/{cache['max_size']}\n"
+        f"   Попаданий: {cache['hits']} из {lookups} ({hit_rate}%)\n"
+    )
+    
+    events = await adb.event_stats()
+    text += (
+        "\n📈 <b>События:</b>\n"
+        f"   Записано: {events['written']}, в буфере: {events['buffered']}\n"
+        f"   Отброшено: {events['dropped']}\n"
+    )
+    
     keyboard = [[InlineKeyboardButton(
         "◀️ Назад",
         callback_data='admin_panel'
@@ -419,16 +478,90 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='HTML'
     )
 
+# Строки экрана динамики: (ключ метрики, подпись)
+TREND_METRICS = [
+    ('orders', '🆕 Новые заказы'),
+    ('completed', '✅ Завершено'),
+    ('cancelled', '❌ Отменено'),
+    ('users', '👤 Новые пользователи'),
+    ('messages', '💬 Сообщения в чатах')
+]
+
+def format_change(current: int, previous: int) -> str:
+    """Изменение относительно предыдущего периода"""
+    if current == previous:
+        return '='
+    if not previous:
+        return f'▲ +{current}'
+    percent = int((current - previous) * 100 / previous)
+    arrow = '▲' if current > previous else '▼'
+    return f'{arrow} {current - previous:+d}, {percent:+d}%'
+
+def build_trends_page(trends: dict):
+    """Текст и клавиатура экрана динамики"""
+    days = trends['days']
+    start = datetime.fromisoformat(trends['start']).strftime('%d.%m')
+    current, previous = trends['current'], trends['previous']
+    
+    text = f"📈 <b>Динамика за {days} дн.</b> (с {start})\n\n"
+    for metric, title in TREND_METRICS:
+        text += (
+            f"{title}: <b>{current[metric]}</b> "
+            f"({format_change(current[metric], previous[metric])})\n"
+        )
+    text += f"<i>в скобках - к предыдущим {days} дн.</i>\n"
+    
+    text += (
+        "\n📦 <b>Заказы по дням:</b>\n"
+        f"<code>{create_sparkline(trends['daily']['orders'])}</code>\n"
+        "👤 <b>Пользователи по дням:</b>\n"
+        f"<code>{create_sparkline(trends['daily']['users'])}</code>\n"
+    )
+    
+    if trends['by_tariff']:
+        text += "\n💼 <b>По тарифам</b> (заказы / ✅ / ❌):\n"
+        tariffs = sorted(trends['by_tariff'].items(), key=lambda item: -item[1]['orders'])
+        for tariff, counts in tariffs:
+            text += (
+                f"{escape_html(tariff)}: "
+                f"{counts['orders']} / {counts['completed']} / {counts['cancelled']}\n"
+            )
+    
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                f"• {period} дн. •" if period == days else f"{period} дн.",
+                callback_data=f'admin_trends_{period}'
+            )
+            for period in TRENDS_PERIODS
+        ],
+        [InlineKeyboardButton("◀️ Назад", callback_data='admin_panel')]
+    ]
+    return text, InlineKeyboardMarkup(keyboard)
+
+@admin_only
+async def admin_trends(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Динамика за 7/30/90 дней по дневным агрегатам"""
+    query = update.callback_query
+    await query.answer()
+    
+    days = context.args[0] if context.args else TRENDS_PERIODS[0]
+    if days not in TRENDS_PERIODS:
+        days = TRENDS_PERIODS[0]
+    
+    text, reply_markup = build_trends_page(await adb.get_trends(days))
+    await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='HTML')
+
 # Новые функции для работы с сообщениями
 
+@track_step('message', 'start')
 async def admin_message_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Начало отправки сообщения пользователю"""
     query = update.callback_query
     await query.answer()
     
-    # Парсим данные: admin_message_ORDER_ID
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
@@ -441,7 +574,7 @@ async def admin_message_start(update: Update, context: ContextTypes.DEFAULT_TYPE
     }
     
     # Получаем историю сообщений
-    messages = db.get_order_messages(order_id)
+    messages = await adb.get_order_messages(order_id)
     
     text = (
         f"💬 <b>Чат с клиентом</b>\n\n"
@@ -464,6 +597,7 @@ async def admin_message_start(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     return ADMIN_MESSAGE
 
+@track_step('message', 'send')
 async def admin_send_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Отправка сообщения пользователю"""
     message_text = update.message.text.strip()
@@ -486,13 +620,13 @@ async def admin_send_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
     admin_id = update.effective_user.id
     
     try:
-        order = db.get_order(order_id)
+        order = await adb.get_order(order_id)
         if not order:
             await update.message.reply_text("❌ Заказ не найден")
             return ConversationHandler.END
         
         # Сохраняем сообщение в БД
-        db.add_message(
+        await adb.add_message(
             order_id=order_id,
             user_id=user_id,
             message=message_text,
@@ -514,10 +648,10 @@ async def admin_send_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
             [InlineKeyboardButton("📦 Все заказы", callback_data="my_orders")]
         ]
         
-        # Отправляем пользователю
-        sent_message = await context.bot.send_message(
-            chat_id=user_id,
-            text=user_text,
+        # Отправляем пользователю (через очередь)
+        await outbox.send(
+            user_id,
+            user_text,
             reply_markup=InlineKeyboardMarkup(user_keyboard),
             parse_mode='HTML'
         )
@@ -560,14 +694,21 @@ async def show_order_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
         return
     
-    messages = db.get_order_messages(order_id)
+    cursor_key = f'admin_chat_{order_id}'
+    page, cursor = get_page_cursor(
+        context.user_data, cursor_key, parse_page(context.args[1:])
+    )
+    messages, next_cursor = await adb.get_order_messages_page(
+        order_id, after=cursor, limit=MESSAGES_PER_PAGE
+    )
+    save_page_cursor(context.user_data, cursor_key, page, next_cursor)
     
     text = (
         f"💬 <b>Переписка по заказу #{order['order_number']}</b>\n\n"
@@ -581,12 +722,181 @@ async def show_order_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text += f"{sender} ({msg['created_at'][:16]}):\n{msg['message']}\n\n"
     
     keyboard = [
-        [InlineKeyboardButton("✏️ Написать", callback_data=f"admin_message_{order_id}")],
-        [InlineKeyboardButton("◀️ Назад", callback_data=f"admin_order_{order_id}")]
+        [InlineKeyboardButton("✏️ Написать", callback_data=f"admin_message_{order_id}")]
     ]
     
     await query.edit_message_text(
         text,
+        reply_markup=kb.pagination(
+            page, None, cursor_key,
+            rows=keyboard,
+            has_next=next_cursor is not None,
+            back_callback=f"admin_order_{order_id}"
+        ),
+        parse_mode='HTML'
+    )
+
+# ============= ПОИСК =============
+
+def format_snippet(snippet: str) -> str:
+    """Фрагмент из поиска: экранируем текст, найденные слова - жирным"""
+    open_mark, close_mark = SNIPPET_MARKS
+    return (escape_html(snippet or '')
+            .replace(open_mark, '<b>')
+            .replace(close_mark, '</b>'))
+
+async def build_search_page(search_text: str, page: int = 0):
+    """Текст и клавиатура страницы результатов поиска"""
+    hits, has_next = await adb.search(
+        search_text,
+        offset=page * SEARCH_RESULTS_PER_PAGE,
+        limit=SEARCH_RESULTS_PER_PAGE
+    )
+    
+    text = f"🔎 <b>Поиск: «{escape_html(search_text)}»</b> (стр. {page + 1})\n\n"
+    
+    if not hits:
+        text += "Ничего не найдено" if page == 0 else "Больше совпадений нет"
+    
+    keyboard = []
+    for hit in hits:
+        status = ORDER_STATUSES.get(hit['status'], hit['status'])
+        icon = "📋" if hit['kind'] == 'order' else "💬"
+        text += (
+            f"{icon} <b>#{hit['order_number']}</b> · {escape_html(hit['name'] or '')} · {status}\n"
+            f"   {format_snippet(hit['snippet'])}\n"
+        )
+        if hit['kind'] == 'message':
+            text += f"   <i>сообщение от {hit['created_at'][:16]}</i>\n"
+        text += "\n"
+        keyboard.append([InlineKeyboardButton(
+            f"{icon} #{hit['order_number']}",
+            callback_data=f"admin_order_{hit['order_id']}"
+        )])
+    
+    reply_markup = kb.pagination(
+        page, None, 'find',
+        rows=keyboard,
+        has_next=has_next,
+        back_callback='admin_panel'
+    )
+    return text, reply_markup
+
+@admin_only
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /find ТЕКСТ - поиск по заказам и переписке"""
+    parts = update.message.text.split(None, 1)
+    if len(parts) < 2:
+        await update.message.reply_text(
+            "🔎 <b>Поиск</b>\n\n"
+            "Использование: /find текст\n"
+            "Ищет по номеру заказа, имени, контактам, описанию и переписке.",
+            parse_mode='HTML'
+        )
+        return
+    
+    # Запрос не помещается в callback_data - листаем по сохранённому
+    context.user_data['find_query'] = parts[1]
+    text, reply_markup = await build_search_page(parts[1])
+    
+    await update.message.reply_text(
+        text,
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
+
+@admin_only
+async def find_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Страница результатов поиска"""
+    query = update.callback_query
+    await query.answer()
+    
+    search_text = context.user_data.get('find_query')
+    if not search_text:
+        await query.edit_message_text("🔎 Поиск устарел, повторите /find")
+        return
+    
+    text, reply_markup = await build_search_page(search_text, parse_page(context.args))
+    
+    await query.edit_message_text(
+        text,
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
+
+# ============= РАССЫЛКИ =============
+
+@admin_only
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /broadcast ТЕКСТ - подготовить рассылку всем пользователям"""
+    parts = update.message.text.split(None, 1)
+    if len(parts) < 2:
+        await update.message.reply_text(
+            "📣 <b>Рассылка</b>\n\n"
+            "Использование: /broadcast текст сообщения\n"
+            "Поддерживается HTML-разметка.",
+            parse_mode='HTML'
+        )
+        return
+    
+    text = parts[1]
+    broadcast_id = await adb.create_broadcast(text, update.effective_user.id)
+    broadcast = await adb.get_broadcast(broadcast_id)
+    
+    keyboard = [[
+        InlineKeyboardButton("✅ Отправить", callback_data=f"broadcast_confirm_{broadcast_id}"),
+        InlineKeyboardButton("❌ Отмена", callback_data=f"broadcast_cancel_{broadcast_id}")
+    ]]
+    
+    # Предпросмотр заодно проверяет разметку: с ошибкой в HTML
+    # сообщение не дошло бы ни до кого
+    try:
+        await update.message.reply_text(text, parse_mode='HTML')
+    except Exception as e:
+        await adb.finish_broadcast(broadcast_id, 'cancelled')
+        await update.message.reply_text(f"❌ Текст не удалось отправить: {e}")
+        return
+    
+    await update.message.reply_text(
+        f"👆 Так сообщение увидят пользователи.\n\n"
+        f"Получателей: <b>{broadcast['total']}</b>. Отправить?",
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode='HTML'
     )
+
+@admin_only
+async def broadcast_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Запуск рассылки"""
+    query = update.callback_query
+    await query.answer()
+    
+    broadcast_id = context.args[0]
+    broadcast = await adb.start_broadcast(
+        broadcast_id, query.message.chat_id, query.message.message_id
+    )
+    
+    if not broadcast:
+        await query.edit_message_text("❌ Рассылка уже запущена или отменена")
+        return
+    
+    await query.edit_message_text(
+        format_broadcast(broadcast),
+        reply_markup=broadcast_keyboard(broadcast),
+        parse_mode='HTML'
+    )
+    broadcaster.start(context.bot, broadcast_id)
+
+@admin_only
+async def broadcast_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Отмена черновика или остановка идущей рассылки"""
+    query = update.callback_query
+    broadcast_id = context.args[0]
+    broadcast = await adb.finish_broadcast(broadcast_id, 'cancelled')
+    
+    if not broadcast:
+        await query.answer("Рассылка уже завершена", show_alert=True)
+        return
+    
+    await query.answer()
+    # Идущая рассылка заметит остановку после текущей пачки
+    await query.edit_message_text(format_broadcast(broadcast), parse_mode='HTML')
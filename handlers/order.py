@@ -1,7 +1,10 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from database import db
+from database import adb
 from keyboards import kb
+from screens import screens
+from utils.outbox import outbox, PRIORITY_ADMIN
+from utils.decorators import track_step
 from config import TARIFFS, ADMIN_IDS, ORDER_STATUSES
 import logging
 
@@ -10,40 +13,29 @@ logger = logging.getLogger(__name__)
 # Состояния для ConversationHandler
 SELECT_TARIFF, ENTER_NAME, ENTER_DESCRIPTION, SELECT_BUDGET, ENTER_CONTACT = range(5)
 
+@track_step('order', 'start')
 async def start_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Начало оформления заказа - выбор тарифа"""
     query = update.callback_query
     await query.answer()
     
-    text = (
-        "🛒 <b>Оформление заказа</b>\n\n"
-        "Отлично! Давайте оформим ваш заказ.\n\n"
-        "<b>Шаг 1/5: Выберите тип услуги</b>\n\n"
-        "🤖 <b>Telegram боты:</b>\n"
-        "• Простой - 1,000 ₽\n"
-        "• Средней сложности - 2,000 ₽\n"
-        "• Сложный - 3,500 ₽\n\n"
-        "🌐 <b>Веб-сайты:</b>\n"
-        "• Любой сайт - 2,500 ₽\n\n"
-        "🔌 <b>Дополнительно:</b>\n"
-        "• API интеграция - от 500 ₽\n\n"
-        "💡 API интеграции оплачиваются отдельно"
-    )
+    text, reply_markup = screens.order_start()
     
     await query.edit_message_text(
         text,
-        reply_markup=kb.tariff_selection(),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
     
     return SELECT_TARIFF
 
+@track_step('order', 'tariff')
 async def select_tariff(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка выбора тарифа"""
     query = update.callback_query
     await query.answer()
     
-    tariff_key = query.data.replace('tariff_', '')
+    tariff_key = context.args[0]
     
     if tariff_key not in TARIFFS:
         await query.edit_message_text("❌ Неверный тариф")
@@ -74,6 +66,7 @@ async def select_tariff(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return ENTER_NAME
 
+@track_step('order', 'name')
 async def enter_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка ввода имени"""
     name = update.message.text.strip()
@@ -139,6 +132,7 @@ async def enter_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return ENTER_DESCRIPTION
 
+@track_step('order', 'description')
 async def enter_description(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка описания проекта"""
     description = update.message.text.strip()
@@ -176,20 +170,21 @@ async def enter_description(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return SELECT_BUDGET
 
+@track_step('order', 'budget')
 async def select_budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка выбора бюджета"""
     query = update.callback_query
     await query.answer()
     
     budget_map = {
-        'budget_1500': 'До 1,500 ₽',
-        'budget_2500': '1,500 - 2,500 ₽',
-        'budget_5000': '2,500 - 5,000 ₽',
-        'budget_5000plus': '5,000+ ₽',
-        'budget_unknown': 'Не определился'
+        '1500': 'До 1,500 ₽',
+        '2500': '1,500 - 2,500 ₽',
+        '5000': '2,500 - 5,000 ₽',
+        '5000plus': '5,000+ ₽',
+        'unknown': 'Не определился'
     }
     
-    budget = budget_map.get(query.data, 'Не указан')
+    budget = budget_map.get(context.args[0], 'Не указан')
     context.user_data['budget'] = budget
     
     text = (
@@ -206,6 +201,7 @@ async def select_budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return ENTER_CONTACT
 
+@track_step('order', 'contact')
 async def enter_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Финальный шаг - получение контактов и создание заказа"""
     contact = update.message.text.strip()
@@ -230,7 +226,7 @@ async def enter_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_data = context.user_data
     
     try:
-        order_id = db.create_order(
+        order_id = await adb.create_order(
             user_id=user.id,
             name=user_data['name'],
             contact=user_data['contact'],
@@ -239,7 +235,7 @@ async def enter_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
             budget=user_data['budget']
         )
         
-        order = db.get_order(order_id)
+        order = await adb.get_order(order_id)
         tariff = TARIFFS[user_data['tariff']]
         
         # Формируем подтверждение для клиента
@@ -357,26 +353,18 @@ async def enter_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )]
         ]
         
-        # Отправляем всем администраторам
-        sent_count = 0
-        for admin_id in ADMIN_IDS:
-            try:
-                await context.bot.send_message(
-                    chat_id=admin_id,
-                    text=admin_text,
-                    reply_markup=InlineKeyboardMarkup(admin_keyboard),
-                    parse_mode='HTML'
-                )
-                sent_count += 1
-                logger.info(f"Уведомление отправлено админу {admin_id}")
-            except Exception as e:
-                logger.error(f"Ошибка отправки админу {admin_id}: {e}")
+        # Отправляем всем администраторам (через очередь)
+        queued = await outbox.send_many(
+            ADMIN_IDS, admin_text, PRIORITY_ADMIN,
+            reply_markup=InlineKeyboardMarkup(admin_keyboard),
+            parse_mode='HTML'
+        )
         
         logger.info(
             f"Создан заказ #{order['order_number']} | "
             f"User: {user.id} | "
             f"Tariff: {tariff['name']} | "
-            f"Уведомлено админов: {sent_count}/{len(ADMIN_IDS)}"
+            f"Уведомлений админам в очереди: {len(queued)}"
         )
         
     except Exception as e:
@@ -396,6 +384,7 @@ async def enter_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return ConversationHandler.END
 
+@track_step('order', 'cancel')
 async def cancel_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Отмена оформления заказа"""
     query = update.callback_query
@@ -1,10 +1,12 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from database import db
+from database import adb
 from keyboards import kb
-from config import TARIFFS, BUTTONS, ORDER_STATUSES, ADMIN_IDS
+from screens import screens
+from utils.chat_digest import chat_digest
+from config import BUTTONS, ORDER_STATUSES, USER_ORDERS_PER_PAGE
+from utils.helpers import parse_page, get_page_cursor, save_page_cursor
 import logging
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     
     # Регистрируем пользователя
-    db.add_user(
+    await adb.touch_user(
         user_id=user.id,
         username=user.username,
         first_name=user.first_name,
@@ -21,7 +23,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     # Проверяем, администратор ли
-    is_admin = db.is_admin(user.id)
+    is_admin = await adb.is_admin(user.id)
     
     text = (
         f"👋 <b>Добро пожаловать, {user.first_name}!</b>\n\n"
@@ -60,71 +62,21 @@ async def show_tariffs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    text = "💰 <b>Наш прайс-лист:</b>\n\n"
-    
-    # Группируем по категориям
-    text += "🤖 <b>TELEGRAM БОТЫ:</b>\n\n"
-    
-    # Боты
-    for key in ['bot_simple', 'bot_medium', 'bot_complex']:
-        tariff = TARIFFS[key]
-        text += f"<b>{tariff['name']}</b>\n"
-        text += f"💵 {tariff['price_text']}\n"
-        for feature in tariff['features']:
-            text += f"  {feature}\n"
-        text += "\n"
-    
-    text += "─" * 30 + "\n\n"
-    
-    # Сайты
-    text += "🌐 <b>ВЕБ-САЙТЫ:</b>\n\n"
-    tariff = TARIFFS['website']
-    text += f"<b>{tariff['name']}</b>\n"
-    text += f"💵 {tariff['price_text']}\n"
-    for feature in tariff['features']:
-        text += f"  {feature}\n"
-    text += "\n"
-    
-    text += "─" * 30 + "\n\n"
-    
-    # API
-    text += "🔌 <b>ДОПОЛНИТЕЛЬНО:</b>\n\n"
-    tariff = TARIFFS['api_integration']
-    text += f"<b>{tariff['name']}</b>\n"
-    text += f"💵 {tariff['price_text']}\n"
-    for feature in tariff['features']:
-        text += f"  {feature}\n"
-    text += "\n"
-    
-    text += "─" * 30 + "\n\n"
-    
-    text += (
-        "💡 <b>Важно:</b>\n"
-        "• Цена финальная, без скрытых платежей\n"
-        "• Подключение API оплачивается отдельно\n"
-        "• Сложные интеграции обсуждаются индивидуально\n"
-        "• Предоплата 50%, остаток после сдачи\n\n"
-        "📞 Для заказа нажмите кнопку ниже"
-    )
-    
-    keyboard = [
-        [InlineKeyboardButton(BUTTONS['order'], callback_data='order')],
-        [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
-    ]
+    text, reply_markup = screens.tariffs()
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
-async def show_my_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Показать заказы пользователя"""
-    query = update.callback_query
-    await query.answer()
-    
-    user_id = update.effective_user.id
-    orders = db.get_user_orders(user_id)
+async def build_user_orders(user_id: int, user_data: dict, page: int = 0):
+    """Текст и клавиатура страницы «Мои заказы»"""
+    page, cursor = get_page_cursor(user_data, 'my_orders', page)
+    orders, next_cursor = await adb.get_user_orders_page(
+        user_id, after=cursor, limit=USER_ORDERS_PER_PAGE
+    )
+    save_page_cursor(user_data, 'my_orders', page, next_cursor)
     
     if not orders:
         text = (
@@ -136,39 +88,61 @@ async def show_my_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
             [InlineKeyboardButton(BUTTONS['order'], callback_data='order')],
             [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
         ]
-    else:
-        text = f"📦 <b>Ваши заказы ({len(orders)}):</b>\n\n"
-        
-        for order in orders[:10]:  # Показываем последние 10
-            status = ORDER_STATUSES.get(order['status'], order['status'])
-            text += (
-                f"🔹 <b>Заказ #{order['order_number']}</b>\n"
-                f"   Тариф: {order['tariff']}\n"
-                f"   Статус: {status}\n"
-                f"   Дата: {order['created_at'][:10]}\n\n"
-            )
-        
-        keyboard = []
-        for order in orders[:10]:
-            keyboard.append([InlineKeyboardButton(
-                f"#{order['order_number']} - {ORDER_STATUSES.get(order['status'])}",
-                callback_data=f"view_order_{order['id']}"
-            )])
-        keyboard.append([InlineKeyboardButton(BUTTONS['back'], callback_data='start')])
+        return text, InlineKeyboardMarkup(keyboard)
+    
+    text = f"📦 <b>Ваши заказы (стр. {page + 1}):</b>\n\n"
+    
+    for order in orders:
+        status = ORDER_STATUSES.get(order['status'], order['status'])
+        text += (
+            f"🔹 <b>Заказ #{order['order_number']}</b>\n"
+            f"   Тариф: {order['tariff']}\n"
+            f"   Статус: {status}\n"
+            f"   Дата: {order['created_at'][:10]}\n\n"
+        )
+    
+    keyboard = []
+    for order in orders:
+        keyboard.append([InlineKeyboardButton(
+            f"#{order['order_number']} - {ORDER_STATUSES.get(order['status'])}",
+            callback_data=f"view_order_{order['id']}"
+        )])
+    
+    reply_markup = kb.pagination(
+        page, None, 'my_orders',
+        rows=keyboard,
+        has_next=next_cursor is not None
+    )
+    return text, reply_markup
+
+async def show_my_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показать заказы пользователя"""
+    query = update.callback_query
+    await query.answer()
+    
+    text, reply_markup = await build_user_orders(
+        update.effective_user.id,
+        context.user_data,
+        parse_page(context.args)
+    )
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
+async def page_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Нажатие на индикатор страницы - просто закрываем «часики»"""
+    await update.callback_query.answer()
+
 async def show_order_detail(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать детали заказа"""
     query = update.callback_query
     await query.answer()
     
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
@@ -190,7 +164,7 @@ async def show_order_detail(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text += f"💬 <b>Комментарий:</b>\n{order['admin_comment']}\n\n"
     
     # Проверяем, есть ли сообщения
-    messages = db.get_order_messages(order_id)
+    messages = await adb.get_order_messages(order_id)
     if messages:
         text += f"💬 <b>Последние сообщения:</b> {len(messages)} шт.\n\n"
         # Показываем последнее сообщение
@@ -213,37 +187,11 @@ async def show_about(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    text = (
-        "<b>ℹ️ О BotFactory</b>\n\n"
-        "Мы — команда профессиональных разработчиков, "
-        "специализирующихся на создании Telegram-ботов и веб-сайтов.\n\n"
-        "📊 <b>Наши достижения:</b>\n"
-        "✅ 500+ выполненных проектов\n"
-        "✅ 98% довольных клиентов\n"
-        "✅ Работаем с 2021 года\n"
-        "✅ Средний рейтинг 4.9/5.0\n\n"
-        "🎯 <b>Специализация:</b>\n"
-        "• Telegram боты любой сложности\n"
-        "• Корпоративные сайты\n"
-        "• Интернет-магазины\n"
-        "• Landing Page\n"
-        "• API интеграции\n"
-        "• Автоматизация бизнеса\n\n"
-        "💼 <b>Мы работаем с:</b>\n"
-        "• Стартапами\n"
-        "• Малым и средним бизнесом\n"
-        "• Крупными компаниями\n"
-        "• Частными лицами\n\n"
-        "💰 <b>Ценовая политика:</b>\n"
-        "• Честные цены без накруток\n"
-        "• Оплата по факту выполнения\n"
-        "• Возможна рассрочка\n"
-        "• Бесплатные консультации\n"
-    )
+    text, reply_markup = screens.about()
     
     await query.edit_message_text(
         text,
-        reply_markup=kb.back_button(),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
@@ -252,22 +200,11 @@ async def show_support(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    text = (
-        "<b>💬 Служба поддержки</b>\n\n"
-        "Мы всегда на связи! Выберите удобный способ:\n\n"
-        "📱 <b>Telegram:</b> @botfactory_support\n"
-        "📧 <b>Email:</b> support@botfactory.ru\n\n"
-        "⏰ <b>Режим работы:</b>\n"
-        "Пн-Пт: 9:00 - 21:00 (МСК)\n"
-        "Сб-Вс: 10:00 - 18:00 (МСК)\n\n"
-        "⚡ Среднее время ответа: 15 минут\n"
-        "🎯 В нерабочее время отвечаем до 2 часов\n\n"
-        "💡 <b>Совет:</b> Для быстрого ответа пишите в Telegram"
-    )
+    text, reply_markup = screens.support()
     
     await query.edit_message_text(
         text,
-        reply_markup=kb.back_button(),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
@@ -276,7 +213,7 @@ async def show_reviews(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    reviews = db.get_published_reviews(limit=5)
+    reviews = await adb.get_published_reviews(limit=5)
     
     if not reviews:
         text = "⭐ <b>Отзывы</b>\n\nОтзывов пока нет. Станьте первым!"
@@ -303,59 +240,11 @@ async def show_portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    text = (
-        "📊 <b>Наше портфолио</b>\n\n"
-        "🎯 <b>Примеры выполненных проектов:</b>\n\n"
-        
-        "🤖 <b>TELEGRAM БОТЫ:</b>\n\n"
-        
-        "1️⃣ <b>@ShopBot</b> - Интернет-магазин\n"
-        "   • Каталог товаров с фото\n"
-        "   • Корзина и оформление заказа\n"
-        "   • Админ-панель для управления\n"
-        "   • Интеграция оплаты\n"
-        "   💰 2,500 ₽\n\n"
-        
-        "2️⃣ <b>@BookingBot</b> - Запись клиентов\n"
-        "   • Календарь свободных слотов\n"
-        "   • Автоматические напоминания\n"
-        "   • CRM для мастера\n"
-        "   💰 2,000 ₽\n\n"
-        
-        "3️⃣ <b>@MenuBot</b> - Меню ресторана\n"
-        "   • Красивый каталог блюд\n"
-        "   • Онлайн заказ\n"
-        "   • Уведомления кухне\n"
-        "   💰 1,500 ₽\n\n"
-        
-        "🌐 <b>ВЕБ-САЙТЫ:</b>\n\n"
-        
-        "1️⃣ <b>Корпоративный сайт</b>\n"
-        "   • 5 страниц + блог\n"
-        "   • Адаптивный дизайн\n"
-        "   • Форма обратной связи\n"
-        "   💰 2,500 ₽\n\n"
-        
-        "2️⃣ <b>Landing Page</b>\n"
-        "   • Продающий дизайн\n"
-        "   • Интеграция с CRM\n"
-        "   • SEO оптимизация\n"
-        "   💰 2,500 ₽\n\n"
-        
-        "📸 <b>Больше примеров:</b>\n"
-        "Telegram: @botfactory_portfolio\n"
-        "GitHub: github.com/botfactory\n\n"
-        "💡 Хотите так же? Жмите «Заказать»!"
-    )
-    
-    keyboard = [
-        [InlineKeyboardButton(BUTTONS['order'], callback_data='order')],
-        [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
-    ]
+    text, reply_markup = screens.portfolio()
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode='HTML'
     )
 
@@ -370,7 +259,7 @@ async def process_user_reply(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if active_chat and active_chat.get('initiated'):
         # Если чат инициирован через кнопку, используем сохраненный order_id
         order_id = active_chat['order_id']
-        order = db.get_order(order_id)
+        order = await adb.get_order(order_id)
         
         if not order:
             await update.message.reply_text("❌ Заказ не найден. Пожалуйста, создайте новый.")
@@ -378,9 +267,9 @@ async def process_user_reply(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
     else:
         # Проверяем, есть ли активные заказы у пользователя
-        user_orders = db.get_user_orders(user_id)
+        order = await adb.get_latest_user_order(user_id)
         
-        if not user_orders:
+        if not order:
             # Если нет заказов, считаем это обычным сообщением
             await update.message.reply_text(
                 "Для начала общения с менеджером, пожалуйста, создайте заказ:\n\n"
@@ -388,13 +277,12 @@ async def process_user_reply(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
             return
         
-        # Берем самый свежий заказ для ответа
-        order = user_orders[0]
+        # Отвечаем по самому свежему заказу
         order_id = order['id']
     
     try:
         # Сохраняем сообщение в БД
-        db.add_message(
+        await adb.add_message(
             order_id=order_id,
             user_id=user_id,
             message=message_text,
@@ -420,32 +308,8 @@ async def process_user_reply(update: Update, context: ContextTypes.DEFAULT_TYPE)
             parse_mode='HTML'
         )
         
-        # Уведомляем всех админов
-        admin_text = (
-            f"📨 <b>НОВОЕ СООБЩЕНИЕ ОТ КЛИЕНТА</b>\n\n"
-            f"👤 <b>Клиент:</b> {order['name']}\n"
-            f"📋 <b>Заказ:</b> #{order['order_number']}\n"
-            f"💬 <b>Сообщение:</b>\n\n"
-            f"{message_text}\n\n"
-            f"Отправлено: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-        )
-        
-        admin_keyboard = [
-            [InlineKeyboardButton("✏️ Ответить", callback_data=f"admin_message_{order_id}")],
-            [InlineKeyboardButton("📋 Открыть заказ", callback_data=f"admin_order_{order_id}")]
-        ]
-        
-        # Отправляем всем админам
-        for admin_id in ADMIN_IDS:
-            try:
-                await context.bot.send_message(
-                    chat_id=admin_id,
-                    text=admin_text,
-                    reply_markup=InlineKeyboardMarkup(admin_keyboard),
-                    parse_mode='HTML'
-                )
-            except Exception as e:
-                logger.error(f"Ошибка уведомления админа {admin_id}: {e}")
+        # Уведомляем админов: сообщения, идущие подряд, объединяются
+        chat_digest.add(order, message_text)
         
         logger.info(
             f"Пользователь {user_id} отправил сообщение по заказу #{order['order_number']}"
@@ -464,10 +328,10 @@ async def start_direct_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     user = update.effective_user
     
-    # Проверяем, есть ли у пользователя заказы
-    user_orders = db.get_user_orders(user.id)
+    # Берем последний заказ пользователя
+    latest_order = await adb.get_latest_user_order(user.id)
     
-    if not user_orders:
+    if not latest_order:
         # У пользователя нет заказов, предлагаем создать
         text = (
             "💬 <b>Чат с менеджером</b>\n\n"
@@ -489,8 +353,6 @@ async def start_direct_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Берем последний заказ пользователя
-    latest_order = user_orders[0]
     order_id = latest_order['id']
     
     # Сохраняем ID заказа в контексте
@@ -500,7 +362,7 @@ async def start_direct_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     }
     
     # Получаем историю сообщений
-    messages = db.get_order_messages(order_id)
+    messages = await adb.get_order_messages(order_id)
     
     text = (
         f"💬 <b>Чат с менеджером</b>\n\n"
@@ -536,9 +398,8 @@ async def start_order_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    # Получаем ID заказа из callback_data: chat_order_ORDER_ID
-    order_id = int(query.data.split('_')[2])
-    order = db.get_order(order_id)
+    order_id = context.args[0]
+    order = await adb.get_order(order_id)
     
     if not order:
         await query.edit_message_text("❌ Заказ не найден")
@@ -551,7 +412,7 @@ async def start_order_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     }
     
     # Получаем историю сообщений
-    messages = db.get_order_messages(order_id)
+    messages = await adb.get_order_messages(order_id)
     
     text = (
         f"💬 <b>Чат по заказу #{order['order_number']}</b>\n\n"
@@ -1,9 +1,12 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from config import BUTTONS, ORDER_STATUSES, TARIFFS
+from config import BUTTONS, ORDER_STATUSES, ORDER_TRANSITIONS, TARIFFS
+from utils.render_cache import render_cache
 
 class Keyboards:
+    # Клавиатуры без параметров заказа собираются один раз (см. utils/render_cache.py)
     
     @staticmethod
+    @render_cache.cached
     def main_menu(is_admin=False):
         """Главное меню"""
         keyboard = [
@@ -29,6 +32,7 @@ class Keyboards:
         return InlineKeyboardMarkup(keyboard)
     
     @staticmethod
+    @render_cache.cached
     def back_button():
         """Кнопка назад"""
         return InlineKeyboardMarkup([[
@@ -36,6 +40,7 @@ class Keyboards:
         ]])
     
     @staticmethod
+    @render_cache.cached
     def cancel_button():
         """Кнопка отмены"""
         return InlineKeyboardMarkup([[
@@ -43,6 +48,7 @@ class Keyboards:
         ]])
     
     @staticmethod
+    @render_cache.cached
     def tariff_selection():
         """Выбор тарифа"""
         keyboard = []
@@ -94,6 +100,7 @@ class Keyboards:
         return InlineKeyboardMarkup(keyboard)
     
     @staticmethod
+    @render_cache.cached
     def budget_selection():
         """Выбор бюджета"""
         keyboard = [
@@ -116,6 +123,7 @@ class Keyboards:
         return InlineKeyboardMarkup(keyboard)
     
     @staticmethod
+    @render_cache.cached
     def admin_panel():
         """Админ-панель"""
         keyboard = [
@@ -125,6 +133,7 @@ class Keyboards:
                 InlineKeyboardButton("👥 Пользователи", callback_data='admin_users'),
                 InlineKeyboardButton("📊 Статистика", callback_data='admin_stats')
             ],
+            [InlineKeyboardButton("📈 Динамика", callback_data='admin_trends')],
             [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
         ]
         return InlineKeyboardMarkup(keyboard)
@@ -142,10 +151,13 @@ class Keyboards:
         return InlineKeyboardMarkup(keyboard)
     
     @staticmethod
-    def status_selection(order_id):
-        """Выбор статуса заказа"""
+    def status_selection(order_id, current_status=None):
+        """Выбор статуса заказа (только допустимые переходы)"""
+        allowed = ORDER_TRANSITIONS.get(current_status, ORDER_STATUSES)
         keyboard = []
         for status_key, status_name in ORDER_STATUSES.items():
+            if status_key not in allowed:
+                continue
             keyboard.append([InlineKeyboardButton(
                 status_name,
                 callback_data=f'setstatus_{order_id}_{status_key}'
@@ -157,32 +169,47 @@ class Keyboards:
         return InlineKeyboardMarkup(keyboard)
     
     @staticmethod
-    def pagination(current_page, total_pages, callback_prefix):
-        """Пагинация"""
-        keyboard = []
+    def pagination(current_page, total_pages, callback_prefix,
+                   rows=None, has_next=None, back_callback='start'):
+        """Пагинация
+        
+        rows - кнопки элементов страницы над навигацией. Если общее число
+        страниц неизвестно (keyset-пагинация), total_pages=None и наличие
+        следующей страницы передаётся в has_next.
+        """
+        keyboard = list(rows or [])
         buttons = []
         
+        if has_next is None:
+            has_next = current_page < total_pages - 1
+        
         if current_page > 0:
             buttons.append(InlineKeyboardButton(
                 "⬅️ Назад",
                 callback_data=f'{callback_prefix}_{current_page - 1}'
             ))
         
-        buttons.append(InlineKeyboardButton(
-            f"{current_page + 1}/{total_pages}",
-            callback_data='page_info'
-        ))
+        if current_page > 0 or has_next:
+            page_text = (
+                f"{current_page + 1}/{total_pages}" if total_pages
+                else f"{current_page + 1}"
+            )
+            buttons.append(InlineKeyboardButton(
+                page_text,
+                callback_data='page_info'
+            ))
         
-        if current_page < total_pages - 1:
+        if has_next:
             buttons.append(InlineKeyboardButton(
                 "Вперёд ➡️",
                 callback_data=f'{callback_prefix}_{current_page + 1}'
             ))
         
-        keyboard.append(buttons)
+        if buttons:
+            keyboard.append(buttons)
         keyboard.append([InlineKeyboardButton(
             BUTTONS['back'],
-            callback_data='start'
+            callback_data=back_callback
         )])
         
         return InlineKeyboardMarkup(keyboard)
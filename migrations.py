@@ -0,0 +1,420 @@
+"""Миграции схемы базы данных.
+
+Версия схемы хранится в PRAGMA user_version. Миграция с номером N
+(нумерация с 1) применяется, если user_version < N, после чего версия
+выставляется в N в той же транзакции. Добавлять миграции только в конец
+списка, уже выпущенные не редактировать.
+"""
+
+MIGRATIONS = [
+    # 1. Исходная схема
+    [
+        # Таблица пользователей
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            is_admin INTEGER DEFAULT 0,
+            is_blocked INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Таблица заказов
+        '''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            order_number TEXT UNIQUE,
+            name TEXT,
+            contact TEXT,
+            tariff TEXT,
+            description TEXT,
+            budget TEXT,
+            status TEXT DEFAULT 'new',
+            admin_comment TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+        ''',
+        # Таблица истории статусов
+        '''
+        CREATE TABLE IF NOT EXISTS order_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER,
+            old_status TEXT,
+            new_status TEXT,
+            comment TEXT,
+            changed_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (order_id) REFERENCES orders(id)
+        )
+        ''',
+        # Таблица отзывов
+        '''
+        CREATE TABLE IF NOT EXISTS reviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            order_id INTEGER,
+            rating INTEGER,
+            text TEXT,
+            is_published INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (order_id) REFERENCES orders(id)
+        )
+        ''',
+        # Таблица статистики
+        '''
+        CREATE TABLE IF NOT EXISTS statistics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT,
+            event_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Таблица сообщений
+        '''
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER,
+            user_id INTEGER,
+            is_admin INTEGER DEFAULT 0,
+            admin_id INTEGER,
+            message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (order_id) REFERENCES orders(id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+        '''
+    ],
+    
+    # 2. Вторичные индексы под основные выборки
+    [
+        # get_user_orders: WHERE user_id ORDER BY created_at
+        '''
+        CREATE INDEX IF NOT EXISTS idx_orders_user_created
+        ON orders (user_id, created_at, id)
+        ''',
+        # get_all_orders(status=...): WHERE status ORDER BY created_at
+        '''
+        CREATE INDEX IF NOT EXISTS idx_orders_status_created
+        ON orders (status, created_at, id)
+        ''',
+        # get_all_orders(): ORDER BY created_at
+        '''
+        CREATE INDEX IF NOT EXISTS idx_orders_created
+        ON orders (created_at, id)
+        ''',
+        # get_all_users(): ORDER BY created_at
+        '''
+        CREATE INDEX IF NOT EXISTS idx_users_created
+        ON users (created_at, user_id)
+        ''',
+        # get_order_messages / get_last_message: WHERE order_id ORDER BY created_at
+        '''
+        CREATE INDEX IF NOT EXISTS idx_messages_order_created
+        ON messages (order_id, created_at, id)
+        ''',
+        # get_order_history: WHERE order_id ORDER BY created_at
+        '''
+        CREATE INDEX IF NOT EXISTS idx_history_order_created
+        ON order_history (order_id, created_at, id)
+        '''
+    ],
+    
+    # 3. Счётчики для статистики (поддерживаются при записи)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        ''',
+        # Заполняем по уже существующим данным
+        '''
+        INSERT OR REPLACE INTO counters (name, value)
+        SELECT 'users', COUNT(*) FROM users
+        UNION ALL
+        SELECT 'orders', COUNT(*) FROM orders
+        UNION ALL
+        SELECT 'orders:status:' || status, COUNT(*) FROM orders
+        WHERE status IS NOT NULL GROUP BY status
+        UNION ALL
+        SELECT 'orders:day:' || DATE(created_at), COUNT(*) FROM orders
+        WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+        UNION ALL
+        SELECT 'users:day:' || DATE(created_at), COUNT(*) FROM users
+        WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+        '''
+    ],
+    
+    # 4. Частичный индекс для выборки администраторов
+    [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_users_admins
+        ON users (user_id) WHERE is_admin = 1
+        '''
+    ],
+    
+    # 5. Статус 'in' - следствие старого разбора callback_data
+    #    setstatus_ID_in_progress; возвращаем его к in_progress
+    [
+        "UPDATE orders SET status = 'in_progress' WHERE status = 'in'",
+        "UPDATE order_history SET old_status = 'in_progress' WHERE old_status = 'in'",
+        "UPDATE order_history SET new_status = 'in_progress' WHERE new_status = 'in'",
+        '''
+        INSERT INTO counters (name, value)
+        SELECT 'orders:status:in_progress', value FROM counters
+        WHERE name = 'orders:status:in'
+        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+        ''',
+        "DELETE FROM counters WHERE name = 'orders:status:in'"
+    ],
+    
+    # 6. Очередь исходящих сообщений
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            options TEXT,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            message_id INTEGER,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending
+        ON outbox (priority, next_attempt_at, id) WHERE status = 'pending'
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_outbox_finished
+        ON outbox (sent_at) WHERE status IN ('sent', 'failed')
+        '''
+    ],
+    
+    # 7. Редактирование ранее отправленных сообщений через очередь
+    [
+        'ALTER TABLE outbox ADD COLUMN edit_message_id INTEGER'
+    ],
+    
+    # 8. Состояние бота: диалоги, user_data, chat_data (persistence.py)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS persistence (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            data BLOB NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (kind, key)
+        ) WITHOUT ROWID
+        '''
+    ],
+    
+    # 9. Рассылки всем пользователям (utils/broadcast.py)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            created_by INTEGER,
+            status TEXT NOT NULL DEFAULT 'draft',
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            progress_chat_id INTEGER,
+            progress_message_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        '''
+    ],
+    
+    # 10. Полнотекстовый поиск по заказам и переписке (/find).
+    # Внешнее содержимое: индекс хранит только токены, текст берётся
+    # из orders/messages; триггеры держат индекс в синхронизации
+    [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS orders_fts USING fts5(
+            order_number, name, contact, description,
+            content = 'orders', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS orders_fts_insert AFTER INSERT ON orders BEGIN
+            INSERT INTO orders_fts (rowid, order_number, name, contact, description)
+            VALUES (new.id, new.order_number, new.name, new.contact, new.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS orders_fts_delete AFTER DELETE ON orders BEGIN
+            INSERT INTO orders_fts (orders_fts, rowid, order_number, name, contact, description)
+            VALUES ('delete', old.id, old.order_number, old.name, old.contact, old.description);
+        END
+        ''',
+        # Смена статуса индекс не трогает - только правка полей поиска
+        '''
+        CREATE TRIGGER IF NOT EXISTS orders_fts_update
+        AFTER UPDATE OF order_number, name, contact, description ON orders BEGIN
+            INSERT INTO orders_fts (orders_fts, rowid, order_number, name, contact, description)
+            VALUES ('delete', old.id, old.order_number, old.name, old.contact, old.description);
+            INSERT INTO orders_fts (rowid, order_number, name, contact, description)
+            VALUES (new.id, new.order_number, new.name, new.contact, new.description);
+        END
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            message,
+            content = 'messages', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message)
+            VALUES ('delete', old.id, old.message);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF message ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message)
+            VALUES ('delete', old.id, old.message);
+            INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+        END
+        ''',
+        # Индексируем уже накопленные данные
+        "INSERT INTO orders_fts (orders_fts) VALUES ('rebuild')",
+        "INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')"
+    ],
+    
+    # 11. Архив завершённых заказов (Database.archive_orders). Длинные
+    #     тексты хранятся сжатыми (BLOB), читаются через zunpack()
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS orders_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            order_number TEXT,
+            name TEXT,
+            contact TEXT,
+            tariff TEXT,
+            description BLOB,
+            budget TEXT,
+            status TEXT,
+            admin_comment BLOB,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_orders_archive_user_created
+        ON orders_archive (user_id, created_at, id)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS messages_archive (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            user_id INTEGER,
+            is_admin INTEGER,
+            admin_id INTEGER,
+            message BLOB,
+            created_at TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_messages_archive_order_created
+        ON messages_archive (order_id, created_at, id)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS order_history_archive (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            old_status TEXT,
+            new_status TEXT,
+            comment BLOB,
+            changed_by INTEGER,
+            created_at TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_history_archive_order_created
+        ON order_history_archive (order_id, created_at, id)
+        '''
+    ],
+    
+    # 12. Дневные агрегаты для динамики (Database._rollup). Метрики:
+    #     orders - новые заказы, status - переходы в статус,
+    #     users - новые пользователи, messages - сообщения в чатах заказов.
+    #     Пустая строка в tariff/status - разрез не применим
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            day TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            tariff TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL DEFAULT '',
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, metric, tariff, status)
+        ) WITHOUT ROWID
+        ''',
+        # Заполняем по уже существующим данным (вместе с архивом)
+        '''
+        WITH all_orders AS (
+            SELECT id, tariff, created_at FROM orders
+            UNION ALL
+            SELECT id, tariff, created_at FROM orders_archive
+        ),
+        all_history AS (
+            SELECT order_id, new_status, created_at FROM order_history
+            WHERE old_status IS NOT NULL
+            UNION ALL
+            SELECT order_id, new_status, created_at FROM order_history_archive
+            WHERE old_status IS NOT NULL
+        ),
+        all_messages AS (
+            SELECT order_id, created_at FROM messages
+            UNION ALL
+            SELECT order_id, created_at FROM messages_archive
+        )
+        INSERT OR REPLACE INTO daily_rollups (day, metric, tariff, status, value)
+        SELECT DATE(created_at), 'orders', COALESCE(tariff, ''), '', COUNT(*)
+        FROM all_orders WHERE created_at IS NOT NULL
+        GROUP BY 1, 3
+        UNION ALL
+        SELECT DATE(h.created_at), 'status', COALESCE(o.tariff, ''), h.new_status, COUNT(*)
+        FROM all_history h LEFT JOIN all_orders o ON o.id = h.order_id
+        WHERE h.created_at IS NOT NULL AND h.new_status IS NOT NULL
+        GROUP BY 1, 3, 4
+        UNION ALL
+        SELECT DATE(created_at), 'users', '', '', COUNT(*)
+        FROM users WHERE created_at IS NOT NULL
+        GROUP BY 1
+        UNION ALL
+        SELECT DATE(m.created_at), 'messages', COALESCE(o.tariff, ''), '', COUNT(*)
+        FROM all_messages m LEFT JOIN all_orders o ON o.id = m.order_id
+        WHERE m.created_at IS NOT NULL
+        GROUP BY 1, 3
+        '''
+    ]
+]
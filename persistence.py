@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import pickle
+from typing import Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from config import PERSISTENCE_FLUSH_INTERVAL
+from database import adb
+
+logger = logging.getLogger(__name__)
+
+class SQLitePersistence(BasePersistence):
+    """Хранение состояний диалогов, user_data и chat_data в SQLite.
+    
+    Application передаёт изменения раз в update_interval секунд; здесь они
+    сравниваются с тем, что уже лежит в БД (по хэшу сериализованных данных),
+    и все реально изменившиеся записи пишутся одной транзакцией.
+    bot_data и callback_data бот не использует и не хранит.
+    """
+    
+    def __init__(self, update_interval: float = PERSISTENCE_FLUSH_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=update_interval
+        )
+        # (kind, key) -> данные для записи (None - удалить)
+        self._pending: Dict[Tuple[str, str], Optional[bytes]] = {}
+        # (kind, key) -> хэш данных, сохранённых в БД
+        self._saved: Dict[Tuple[str, str], int] = {}
+        self._write_task: Optional[asyncio.Task] = None
+    
+    # ========== ЗАГРУЗКА ==========
+    
+    async def _load(self, kind: str) -> Dict[str, object]:
+        rows = await adb.load_persistence(kind)
+        for key, data in rows.items():
+            self._saved[(kind, key)] = hash(data)
+        return {key: pickle.loads(data) for key, data in rows.items()}
+    
+    async def get_user_data(self) -> Dict[int, dict]:
+        return {int(key): data for key, data in (await self._load('user')).items()}
+    
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {int(key): data for key, data in (await self._load('chat')).items()}
+    
+    async def get_bot_data(self) -> dict:
+        return {}
+    
+    async def get_callback_data(self):
+        return None
+    
+    async def get_conversations(self, name: str) -> Dict[tuple, object]:
+        rows = await self._load(f'conversation:{name}')
+        return {tuple(json.loads(key)): state for key, state in rows.items()}
+    
+    # ========== ИЗМЕНЕНИЯ ==========
+    
+    def _stage(self, kind: str, key: str, value):
+        """Запомнить новое значение; пустое значение означает удаление"""
+        empty = value is None or (isinstance(value, dict) and not value)
+        data = None if empty else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        item = (kind, key)
+        
+        if item not in self._pending:
+            if self._saved.get(item) == (hash(data) if data else None):
+                return
+        
+        self._pending[item] = data
+        
+        # Все update_* одного цикла Application вызываются разом - пишем
+        # их общей транзакцией, когда они отработают
+        if self._write_task is None:
+            self._write_task = asyncio.create_task(self._write_pending())
+    
+    async def _write_pending(self):
+        await asyncio.sleep(0)
+        try:
+            # Изменения, пришедшие во время записи, пишутся следующей пачкой
+            while self._pending:
+                pending, self._pending = self._pending, {}
+                if not await self._save(pending):
+                    break
+        finally:
+            self._write_task = None
+    
+    async def _save(self, pending: Dict[Tuple[str, str], Optional[bytes]]) -> bool:
+        upserts = [(kind, key, data) for (kind, key), data in pending.items() if data]
+        deletes = [item for item, data in pending.items() if not data]
+        
+        try:
+            await adb.save_persistence(upserts, deletes)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения состояния бота: {e}")
+            for item, data in pending.items():
+                self._pending.setdefault(item, data)
+            return False
+        
+        for kind, key, data in upserts:
+            self._saved[(kind, key)] = hash(data)
+        for item in deletes:
+            self._saved.pop(item, None)
+        return True
+    
+    async def update_user_data(self, user_id: int, data: dict):
+        self._stage('user', str(user_id), data)
+    
+    async def update_chat_data(self, chat_id: int, data: dict):
+        self._stage('chat', str(chat_id), data)
+    
+    async def update_bot_data(self, data: dict):
+        pass
+    
+    async def update_callback_data(self, data):
+        pass
+    
+    async def update_conversation(self, name: str, key: tuple, new_state):
+        self._stage(f'conversation:{name}', json.dumps(list(key)), new_state)
+    
+    async def drop_user_data(self, user_id: int):
+        self._stage('user', str(user_id), None)
+    
+    async def drop_chat_data(self, chat_id: int):
+        self._stage('chat', str(chat_id), None)
+    
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        pass
+    
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        pass
+    
+    async def refresh_bot_data(self, bot_data: dict):
+        pass
+    
+    async def flush(self):
+        """Записать всё несохранённое (при остановке бота)"""
+        if self._write_task is not None:
+            await self._write_task
+        if self._pending:
+            pending, self._pending = self._pending, {}
+            await self._save(pending)
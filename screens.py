@@ -0,0 +1,240 @@
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from config import TARIFFS, BUTTONS
+from keyboards import kb
+from utils.render_cache import render_cache
+
+class Screens:
+    """Статичные экраны: (текст, клавиатура), собираются один раз"""
+    
+    @staticmethod
+    @render_cache.cached
+    def tariffs():
+        """Прайс-лист"""
+        text = "💰 <b>Наш прайс-лист:</b>\n\n"
+        
+        # Группируем по категориям
+        text += "🤖 <b>TELEGRAM БОТЫ:</b>\n\n"
+        
+        # Боты
+        for key in ['bot_simple', 'bot_medium', 'bot_complex']:
+            tariff = TARIFFS[key]
+            text += f"<b>{tariff['name']}</b>\n"
+            text += f"💵 {tariff['price_text']}\n"
+            for feature in tariff['features']:
+                text += f"  {feature}\n"
+            text += "\n"
+        
+        text += "─" * 30 + "\n\n"
+        
+        # Сайты
+        text += "🌐 <b>ВЕБ-САЙТЫ:</b>\n\n"
+        tariff = TARIFFS['website']
+        text += f"<b>{tariff['name']}</b>\n"
+        text += f"💵 {tariff['price_text']}\n"
+        for feature in tariff['features']:
+            text += f"  {feature}\n"
+        text += "\n"
+        
+        text += "─" * 30 + "\n\n"
+        
+        # API
+        text += "🔌 <b>ДОПОЛНИТЕЛЬНО:</b>\n\n"
+        tariff = TARIFFS['api_integration']
+        text += f"<b>{tariff['name']}</b>\n"
+        text += f"💵 {tariff['price_text']}\n"
+        for feature in tariff['features']:
+            text += f"  {feature}\n"
+        text += "\n"
+        
+        text += "─" * 30 + "\n\n"
+        
+        text += (
+            "💡 <b>Важно:</b>\n"
+            "• Цена финальная, без скрытых платежей\n"
+            "• Подключение API оплачивается отдельно\n"
+            "• Сложные интеграции обсуждаются индивидуально\n"
+            "• Предоплата 50%, остаток после сдачи\n\n"
+            "📞 Для заказа нажмите кнопку ниже"
+        )
+        
+        keyboard = [
+            [InlineKeyboardButton(BUTTONS['order'], callback_data='order')],
+            [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
+        ]
+        
+        return text, InlineKeyboardMarkup(keyboard)
+    
+    @staticmethod
+    @render_cache.cached
+    def about():
+        """О компании"""
+        text = (
+            "<b>ℹ️ О BotFactory</b>\n\n"
+            "Мы — команда профессиональных разработчиков, "
+            "специализирующихся на создании Telegram-ботов и веб-сайтов.\n\n"
+            "📊 <b>Наши достижения:</b>\n"
+            "✅ 500+ выполненных проектов\n"
+            "✅ 98% довольных клиентов\n"
+            "✅ Работаем с 2021 года\n"
+            "✅ Средний рейтинг 4.9/5.0\n\n"
+            "🎯 <b>Специализация:</b>\n"
+            "• Telegram боты любой сложности\n"
+            "• Корпоративные сайты\n"
+            "• Интернет-магазины\n"
+            "• Landing Page\n"
+            "• API интеграции\n"
+            "• Автоматизация бизнеса\n\n"
+            "💼 <b>Мы работаем с:</b>\n"
+            "• Стартапами\n"
+            "• Малым и средним бизнесом\n"
+            "• Крупными компаниями\n"
+            "• Частными лицами\n\n"
+            "💰 <b>Ценовая политика:</b>\n"
+            "• Честные цены без накруток\n"
+            "• Оплата по факту выполнения\n"
+            "• Возможна рассрочка\n"
+            "• Бесплатные консультации\n"
+        )
+        
+        return text, kb.back_button()
+    
+    @staticmethod
+    @render_cache.cached
+    def support():
+        """Поддержка"""
+        text = (
+            "<b>💬 Служба поддержки</b>\n\n"
+            "Мы всегда на связи! Выберите удобный способ:\n\n"
+            "📱 <b>Telegram:</b> @botfactory_support\n"
+            "📧 <b>Email:</b> support@botfactory.ru\n\n"
+            "⏰ <b>Режим работы:</b>\n"
+            "Пн-Пт: 9:00 - 21:00 (МСК)\n"
+            "Сб-Вс: 10:00 - 18:00 (МСК)\n\n"
+            "⚡ Среднее время ответа: 15 минут\n"
+            "🎯 В нерабочее время отвечаем до 2 часов\n\n"
+            "💡 <b>Совет:</b> Для быстрого ответа пишите в Telegram"
+        )
+        
+        return text, kb.back_button()
+    
+    @staticmethod
+    @render_cache.cached
+    def portfolio():
+        """Портфолио"""
+        text = (
+            "📊 <b>Наше портфолио</b>\n\n"
+            "🎯 <b>Примеры выполненных проектов:</b>\n\n"
+            
+            "🤖 <b>TELEGRAM БОТЫ:</b>\n\n"
+            
+            "1️⃣ <b>@ShopBot</b> - Интернет-магазин\n"
+            "   • Каталог товаров с фото\n"
+            "   • Корзина и оформление заказа\n"
+            "   • Админ-панель для управления\n"
+            "   • Интеграция оплаты\n"
+            "   💰 2,500 ₽\n\n"
+            
+            "2️⃣ <b>@BookingBot</b> - Запись клиентов\n"
+            "   • Календарь свободных слотов\n"
+            "   • Автоматические напоминания\n"
+            "   • CRM для мастера\n"
+            "   💰 2,000 ₽\n\n"
+            
+            "3️⃣ <b>@MenuBot</b> - Меню ресторана\n"
+            "   • Красивый каталог блюд\n"
+            "   • Онлайн заказ\n"
+            "   • Уведомления кухне\n"
+            "   💰 1,500 ₽\n\n"
+            
+            "🌐 <b>ВЕБ-САЙТЫ:</b>\n\n"
+            
+            "1️⃣ <b>Корпоративный сайт</b>\n"
+            "   • 5 страниц + блог\n"
+            "   • Адаптивный дизайн\n"
+            "   • Форма обратной связи\n"
+            "   💰 2,500 ₽\n\n"
+            
+            "2️⃣ <b>Landing Page</b>\n"
+            "   • Продающий дизайн\n"
+            "   • Интеграция с CRM\n"
+            "   • SEO оптимизация\n"
+            "   💰 2,500 ₽\n\n"
+            
+            "📸 <b>Больше примеров:</b>\n"
+            "Telegram: @botfactory_portfolio\n"
+            "GitHub: github.com/botfactory\n\n"
+            "💡 Хотите так же? Жмите «Заказать»!"
+        )
+        
+        keyboard = [
+            [InlineKeyboardButton(BUTTONS['order'], callback_data='order')],
+            [InlineKeyboardButton(BUTTONS['back'], callback_data='start')]
+        ]
+        
+        return text, InlineKeyboardMarkup(keyboard)
+    
+    @staticmethod
+    @render_cache.cached
+    def order_start():
+        """Шаг 1 оформления заказа - выбор тарифа"""
+        text = (
+            "🛒 <b>Оформление заказа</b>\n\n"
+            "Отлично! Давайте оформим ваш заказ.\n\n"
+            "<b>Шаг 1/5: Выберите тип услуги</b>\n\n"
+            "🤖 <b>Telegram боты:</b>\n"
+            "• Простой - 1,000 ₽\n"
+            "• Средней сложности - 2,000 ₽\n"
+            "• Сложный - 3,500 ₽\n\n"
+            "🌐 <b>Веб-сайты:</b>\n"
+            "• Любой сайт - 2,500 ₽\n\n"
+            "🔌 <b>Дополнительно:</b>\n"
+            "• API интеграция - от 500 ₽\n\n"
+            "💡 API интеграции оплачиваются отдельно"
+        )
+        
+        return text, kb.tariff_selection()
+    
+    @staticmethod
+    @render_cache.cached
+    def help():
+        """Справка /help"""
+        text = (
+            "❓ <b>Помощь</b>\n\n"
+            
+            "<b>Основные команды:</b>\n"
+            "/start - Главное меню\n"
+            "/help - Эта справка\n"
+            "/orders - Мои заказы\n"
+            "/support - Связаться с поддержкой\n\n"
+            
+            "<b>Как заказать бота:</b>\n"
+            "1. Нажмите «🛒 Заказать бота»\n"
+            "2. Выберите тариф\n"
+            "3. Заполните информацию\n"
+            "4. Дождитесь ответа менеджера\n\n"
+            
+            "<b>Отслеживание заказа:</b>\n"
+            "Статус заказа можно посмотреть в разделе "
+            "«📦 Мои заказы». Вы получите уведомление при "
+            "каждом изменении статуса.\n\n"
+            
+            "Вопросы? Пишите в /support"
+        )
+        
+        return text, None
+
+screens = Screens()
+
+def warm_up():
+    """Собрать статичные экраны и клавиатуры заранее (при старте бота)"""
+    for is_admin in (False, True):
+        kb.main_menu(is_admin)
+    kb.cancel_button()
+    kb.budget_selection()
+    kb.admin_panel()
+    screens.tariffs()
+    screens.about()
+    screens.support()
+    screens.portfolio()
+    screens.order_start()
+    screens.help()
@@ -0,0 +1,66 @@
+"""Запуск бота без связи с Telegram - для локальной проверки webhook-режима.
+
+Запросы к Bot API в сеть не уходят: бот отвечает заглушками и печатает
+исходящие вызовы. Обновления присылает tools/webhook_replay.py:
+
+    python tools/offline_bot.py
+    python tools/webhook_replay.py tools/sample_updates.json
+
+По умолчанию используется отдельная база offline_bot.db. Задержку ответов
+Bot API можно имитировать переменной OFFLINE_API_LATENCY_MS, вывод запросов
+отключается OFFLINE_BOT_VERBOSE=0.
+"""
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# До импорта config: переменные окружения важнее .env
+os.environ.setdefault('BOT_MODE', 'webhook')
+os.environ.setdefault('WEBHOOK_LISTEN', '127.0.0.1')
+os.environ.setdefault('WEBHOOK_URL', 'https://offline.invalid')
+os.environ.setdefault('DATABASE_NAME', 'offline_bot.db')
+
+from telegram.ext import ExtBot
+
+import bot as bot_module
+
+class OfflineBot(ExtBot):
+    """Бот, который не обращается к Telegram, а печатает запросы"""
+    
+    _message_ids = itertools.count(1)
+    latency = int(os.getenv('OFFLINE_API_LATENCY_MS', '0')) / 1000
+    verbose = os.getenv('OFFLINE_BOT_VERBOSE', '1') != '0'
+    
+    async def _do_post(self, endpoint, data, *args, **kwargs):
+        if self.verbose:
+            text = str(data.get('text') or '').replace('\n', ' | ')[:80]
+            print(f"→ {endpoint} chat={data.get('chat_id')} {text}", flush=True)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        if endpoint == 'getMe':
+            return {
+                'id': int(self.token.split(':')[0]),
+                'is_bot': True,
+                'first_name': 'Offline',
+                'username': 'offline_bot'
+            }
+        if endpoint in ('sendMessage', 'editMessageText'):
+            return {
+                'message_id': next(self._message_ids),
+                'date': int(time.time()),
+                'chat': {'id': int(data.get('chat_id') or 0), 'type': 'private'},
+                'text': data.get('text', '')
+            }
+        return True
+
+def main():
+    application = bot_module.build_application(bot=OfflineBot('100000:OFFLINE'))
+    bot_module.run_application(application)
+
+if __name__ == '__main__':
+    main()
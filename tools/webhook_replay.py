@@ -0,0 +1,76 @@
+"""Отправка записанных обновлений на webhook бота.
+
+    python tools/webhook_replay.py tools/sample_updates.json
+    python tools/webhook_replay.py updates.json --url http://127.0.0.1:8443/telegram --repeat 10
+
+Файл - JSON-список объектов Update (как их присылает Telegram). update_id
+перенумеровываются, поэтому файл можно проигрывать повторно.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+
+def post_update(url: str, secret: str, update: dict) -> int:
+    """POST одного обновления, возвращает HTTP-статус"""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(update).encode(),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    if secret:
+        request.add_header('X-Telegram-Bot-Api-Secret-Token', secret)
+    
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('file', help='JSON-файл со списком обновлений')
+    parser.add_argument('--url', default=f'http://127.0.0.1:{WEBHOOK_PORT}/{WEBHOOK_PATH}')
+    parser.add_argument('--secret', default=WEBHOOK_SECRET)
+    parser.add_argument('--repeat', type=int, default=1, help='сколько раз проиграть файл')
+    parser.add_argument('--delay', type=float, default=0.0, help='пауза между обновлениями, с')
+    args = parser.parse_args()
+    
+    with open(args.file, encoding='utf-8') as f:
+        updates = json.load(f)
+    
+    update_id = int(time.time())
+    timings = []
+    for _ in range(args.repeat):
+        for update in updates:
+            update = dict(update, update_id=update_id)
+            update_id += 1
+            
+            started = time.perf_counter()
+            status = post_update(args.url, args.secret, update)
+            elapsed = (time.perf_counter() - started) * 1000
+            timings.append(elapsed)
+            
+            kind = next(key for key in update if key != 'update_id')
+            print(f"{status} {kind:<15} {elapsed:7.1f} мс")
+            
+            if args.delay:
+                time.sleep(args.delay)
+    
+    timings.sort()
+    print(
+        f"\nОтправлено: {len(timings)}, "
+        f"медиана {timings[len(timings) // 2]:.1f} мс, "
+        f"максимум {timings[-1]:.1f} мс"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import Forbidden
+
+from config import BROADCAST_RATE, BROADCAST_CHUNK, BROADCAST_PROGRESS_INTERVAL
+from database import adb
+from utils.helpers import create_progress_bar
+from utils.notify import notifier, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_STATUSES = {
+    'draft': '📝 Черновик',
+    'running': '📤 Идёт отправка',
+    'done': '✅ Завершена',
+    'cancelled': '⏹ Остановлена'
+}
+
+def format_broadcast(broadcast: Dict) -> str:
+    """Текст сообщения с прогрессом рассылки"""
+    done = broadcast['sent'] + broadcast['failed'] + broadcast['blocked']
+    total = max(broadcast['total'], done)
+    
+    return (
+        f"📣 <b>Рассылка #{broadcast['id']}</b>\n"
+        f"{BROADCAST_STATUSES.get(broadcast['status'], broadcast['status'])}\n\n"
+        f"{create_progress_bar(done, total)}\n"
+        f"Обработано: {done} из {total}\n\n"
+        f"✅ Доставлено: {broadcast['sent']}\n"
+        f"🚫 Заблокировали бота: {broadcast['blocked']}\n"
+        f"⚠️ Ошибки: {broadcast['failed']}"
+    )
+
+def broadcast_keyboard(broadcast: Dict) -> InlineKeyboardMarkup:
+    """Кнопка остановки для идущей рассылки"""
+    if broadcast['status'] != 'running':
+        return None
+    return InlineKeyboardMarkup([[InlineKeyboardButton(
+        "⏹ Остановить",
+        callback_data=f"broadcast_stop_{broadcast['id']}"
+    )]])
+
+class Broadcaster:
+    """Рассылка сообщения всем пользователям.
+    
+    Получатели читаются из БД пачками по user_id (keyset), отправка идёт
+    через отдельный ограничитель частоты поверх общего лимита бота. После
+    каждой пачки прогресс сохраняется в broadcasts, поэтому после
+    перезапуска рассылка продолжается с последней сохранённой пачки.
+    """
+    
+    def __init__(self, rate: float = BROADCAST_RATE, chunk: int = BROADCAST_CHUNK):
+        self.chunk = chunk
+        self._limiter = RateLimiter(rate)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._stopping = False
+    
+    def start(self, bot: Bot, broadcast_id: int):
+        """Запустить (или продолжить) рассылку в фоне"""
+        if broadcast_id in self._tasks:
+            return
+        self._stopping = False
+        self._tasks[broadcast_id] = asyncio.create_task(
+            self._run(bot, broadcast_id), name=f'broadcast-{broadcast_id}'
+        )
+    
+    async def resume(self, bot: Bot):
+        """Продолжить рассылки, прерванные остановкой бота"""
+        for broadcast in await adb.get_running_broadcasts():
+            logger.info(
+                f"Продолжаем рассылку #{broadcast['id']} с user_id > {broadcast['last_user_id']}"
+            )
+            self.start(bot, broadcast['id'])
+    
+    async def stop(self):
+        """Дождаться текущих пачек и остановиться (продолжится после запуска)"""
+        self._stopping = True
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+    
+    async def _run(self, bot: Bot, broadcast_id: int):
+        try:
+            broadcast = await adb.get_broadcast(broadcast_id)
+            reported_at = time.monotonic()
+            
+            while broadcast['status'] == 'running' and not self._stopping:
+                recipients = await adb.get_broadcast_recipients(
+                    broadcast['last_user_id'], self.chunk
+                )
+                if not recipients:
+                    broadcast = await adb.finish_broadcast(broadcast_id, 'done') or broadcast
+                    break
+                
+                results = await asyncio.gather(*(
+                    self._send(bot, user_id, broadcast['text']) for user_id in recipients
+                ))
+                
+                sent = sum(1 for result in results if result.ok)
+                blocked = [r.chat_id for r in results if isinstance(r.error, Forbidden)]
+                failed = len(results) - sent - len(blocked)
+                
+                # Статус в ответе покажет, не остановили ли рассылку за это время
+                broadcast = await adb.checkpoint_broadcast(
+                    broadcast_id, recipients[-1], sent, failed, blocked
+                )
+                
+                if time.monotonic() - reported_at >= BROADCAST_PROGRESS_INTERVAL:
+                    await self._report(bot, broadcast)
+                    reported_at = time.monotonic()
+            
+            await self._report(bot, broadcast)
+            if broadcast['status'] != 'running':
+                logger.info(
+                    f"Рассылка #{broadcast_id}: {broadcast['status']}, "
+                    f"доставлено {broadcast['sent']}, заблокировали {broadcast['blocked']}, "
+                    f"ошибок {broadcast['failed']}"
+                )
+        except Exception as e:
+            logger.error(f"Ошибка рассылки #{broadcast_id}: {e}", exc_info=True)
+        finally:
+            self._tasks.pop(broadcast_id, None)
+    
+    async def _send(self, bot: Bot, user_id: int, text: str):
+        await self._limiter.acquire()
+        return await notifier.send(bot, user_id, text, parse_mode='HTML')
+    
+    async def _report(self, bot: Bot, broadcast: Dict):
+        """Обновить сообщение с прогрессом у администратора"""
+        if not broadcast['progress_message_id']:
+            return
+        await notifier.edit(
+            bot, broadcast['progress_chat_id'], broadcast['progress_message_id'],
+            format_broadcast(broadcast),
+            reply_markup=broadcast_keyboard(broadcast),
+            parse_mode='HTML'
+        )
+
+broadcaster = Broadcaster()
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import ADMIN_IDS, CHAT_COALESCE_SECONDS, CHAT_EDIT_WINDOW
+from utils.helpers import escape_html
+from utils.outbox import outbox, PRIORITY_ADMIN
+
+logger = logging.getLogger(__name__)
+
+class ChatDigest:
+    """Объединение сообщений клиента по заказу в одно уведомление админам.
+    
+    Сообщения, пришедшие в течение window секунд, уходят одним уведомлением.
+    Если предыдущее уведомление по заказу было не раньше edit_window секунд
+    назад, новые сообщения дописываются в него правкой, а не новым сообщением.
+    """
+    
+    # Запас до лимита Telegram в 4096 символов
+    MAX_TEXT = 3500
+    
+    def __init__(self, window: float = CHAT_COALESCE_SECONDS,
+                 edit_window: float = CHAT_EDIT_WINDOW):
+        self.window = window
+        self.edit_window = edit_window
+        self._threads: Dict[int, dict] = {}  # order_id -> состояние уведомления
+    
+    def add(self, order: Dict, text: str):
+        """Добавить сообщение клиента; уведомление уйдёт по окончании окна"""
+        now = time.time()
+        self._prune(now)
+        
+        state = self._threads.get(order['id'])
+        if state is None:
+            state = self._threads[order['id']] = {
+                'lock': asyncio.Lock(),
+                'lines': [],  # (время, текст) сообщений в текущем уведомлении
+                'new': 0,  # из них ещё не отправлено
+                'outbox_ids': [],
+                'sent_at': 0.0,
+                'task': None
+            }
+        
+        state['order'] = order
+        state['lines'].append((datetime.now().strftime('%H:%M:%S'), text))
+        state['new'] += 1
+        
+        if state['task'] is None:
+            state['task'] = asyncio.create_task(self._flush_later(order['id']))
+    
+    def _prune(self, now: float):
+        """Забыть заказы, уведомления по которым уже не будут дополняться"""
+        stale = [
+            order_id for order_id, state in self._threads.items()
+            if state['task'] is None and now - state['sent_at'] > self.edit_window
+        ]
+        for order_id in stale:
+            del self._threads[order_id]
+    
+    async def _flush_later(self, order_id: int):
+        await asyncio.sleep(self.window)
+        await self.flush(order_id)
+    
+    async def flush(self, order_id: int):
+        """Отправить накопленные сообщения по заказу"""
+        state = self._threads.get(order_id)
+        if state is None:
+            return
+        
+        async with state['lock']:
+            state['task'] = None
+            new, state['new'] = state['new'], 0
+            if not new:
+                return
+            
+            lines = state['lines']
+            text = self._render(state['order'], lines)
+            fresh = time.time() - state['sent_at'] <= self.edit_window
+            
+            # Дописываем в прошлое уведомление, только если оно свежее и
+            # текст помещается; иначе начинаем новое
+            if not (state['outbox_ids'] and fresh and len(text) <= self.MAX_TEXT):
+                lines = state['lines'] = self._fit(state['order'], lines[-new:])
+                text = self._render(state['order'], lines)
+                state['outbox_ids'] = []
+            
+            markup = self._keyboard(order_id)
+            try:
+                if state['outbox_ids']:
+                    state['outbox_ids'] = await outbox.revise(
+                        state['outbox_ids'], text, PRIORITY_ADMIN,
+                        reply_markup=markup, parse_mode='HTML'
+                    )
+                else:
+                    state['outbox_ids'] = await outbox.send_many(
+                        ADMIN_IDS, text, PRIORITY_ADMIN,
+                        reply_markup=markup, parse_mode='HTML'
+                    )
+                state['sent_at'] = time.time()
+            except Exception as e:
+                logger.error(f"Ошибка уведомления админов по заказу {order_id}: {e}")
+    
+    async def flush_all(self):
+        """Отправить всё накопленное (при остановке бота)"""
+        for order_id, state in list(self._threads.items()):
+            if state['task'] is not None:
+                state['task'].cancel()
+                await self.flush(order_id)
+    
+    def _fit(self, order: Dict, lines: List[tuple]) -> List[tuple]:
+        """Укоротить самые длинные сообщения, чтобы уведомление влезло в MAX_TEXT.
+        
+        Режется исходный текст, а не HTML: обрезка после escape_html может
+        разорвать сущность (&amp;) и Telegram отклонит сообщение.
+        """
+        lines = list(lines)
+        while True:
+            excess = len(self._render(order, lines)) - self.MAX_TEXT
+            if excess <= 0:
+                return lines
+            
+            index = max(range(len(lines)), key=lambda i: len(lines[i][1]))
+            sent_at, text = lines[index]
+            if len(text) <= 1:
+                # Резать уже нечего - отбрасываем самые старые сообщения
+                if len(lines) == 1:
+                    return lines
+                lines.pop(0)
+                continue
+            # Оставляем столько исходных символов, сколько влезает после
+            # экранирования (с учётом многоточия)
+            budget = len(escape_html(text)) - excess - 1
+            cut = 0
+            for char in text:
+                budget -= len(escape_html(char))
+                if budget < 0:
+                    break
+                cut += 1
+            lines[index] = (sent_at, text[:cut] + '…')
+    
+    @staticmethod
+    def _render(order: Dict, lines: List[tuple]) -> str:
+        title = (
+            "📨 <b>НОВОЕ СООБЩЕНИЕ ОТ КЛИЕНТА</b>" if len(lines) == 1
+            else f"📨 <b>НОВЫЕ СООБЩЕНИЯ ОТ КЛИЕНТА</b> ({len(lines)})"
+        )
+        return (
+            f"{title}\n\n"
+            f"👤 <b>Клиент:</b> {escape_html(order['name'])}\n"
+            f"📋 <b>Заказ:</b> #{order['order_number']}\n"
+            f"💬 <b>Сообщения:</b>\n\n"
+            + "\n\n".join(
+                f"🕐 {sent_at}\n{escape_html(text)}" for sent_at, text in lines
+            )
+        )
+    
+    @staticmethod
+    def _keyboard(order_id: int) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton("✏️ Ответить", callback_data=f"admin_message_{order_id}")],
+            [InlineKeyboardButton("📋 Открыть заказ", callback_data=f"admin_order_{order_id}")]
+        ])
+
+chat_digest = ChatDigest()
@@ -1,8 +1,7 @@
 from functools import wraps
 from telegram import Update
 from telegram.ext import ContextTypes
-from database import db
-from config import ADMIN_IDS
+from database import adb
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,8 +12,8 @@ def admin_only(func):
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         user_id = update.effective_user.id
         
-        # Проверяем в конфиге и в БД
-        if user_id not in ADMIN_IDS and not db.is_admin(user_id):
+        # Проверяем по кэшу администраторов (конфиг + БД)
+        if not await adb.is_admin(user_id):
             logger.warning(f"Неавторизованный доступ к админ-функции: {user_id}")
             
             if update.callback_query:
@@ -41,7 +40,7 @@ def track_activity(func):
         # Обновляем информацию о пользователе
         if user:
             try:
-                db.add_user(
+                await adb.touch_user(
                     user_id=user.id,
                     username=user.username,
                     first_name=user.first_name,
@@ -54,6 +53,21 @@ def track_activity(func):
     
     return wrapper
 
+def track_step(conversation: str, step: str):
+    """Событие шага диалога для аналитики (воронка оформления и т.п.)"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+            user = update.effective_user
+            await adb.record_event('step', {
+                'c': conversation, 's': step, 'u': user.id if user else None
+            })
+            return await func(update, context, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
 def error_handler(func):
     """Декоратор для обработки ошибок"""
     @wraps(func)
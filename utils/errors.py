@@ -0,0 +1,140 @@
+import hashlib
+import os
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from config import ERROR_WINDOW, ERROR_NOTIFY_INTERVAL
+
+class ErrorStats:
+    """Счётчики одной ошибки (одного отпечатка)"""
+    
+    def __init__(self, fingerprint: str, error_type: str, where: str):
+        self.fingerprint = fingerprint
+        self.error_type = error_type
+        self.where = where
+        self.message = ''
+        self.total = 0
+        self.first_seen = 0.0
+        self.last_seen = 0.0
+        self.last_notified = 0.0
+        self.suppressed = 0  # повторов с последнего уведомления
+        self.buckets = deque()  # [минута, количество] в пределах окна
+    
+    def window_count(self, now: float, window: float) -> int:
+        """Количество повторов за последние window секунд"""
+        oldest = int((now - window) // 60)
+        while self.buckets and self.buckets[0][0] <= oldest:
+            self.buckets.popleft()
+        return sum(count for _, count in self.buckets)
+
+class ErrorTracker:
+    """Агрегация исключений по отпечатку (тип + верхние кадры стека).
+    
+    Повторы считаются в скользящем окне поминутными корзинами, так что
+    память не растёт с частотой ошибок. Уведомление по отпечатку
+    разрешается не чаще notify_interval; остальное попадает в сводку.
+    
+    В рабочих процессах задаётся forward: ошибки не учитываются на месте,
+    а передаются супервизору, который ведёт единую статистику (workers.py).
+    """
+    
+    # Сколько кадров стека (от места возбуждения) входит в отпечаток
+    FRAMES = 3
+    
+    def __init__(self, window: float = ERROR_WINDOW,
+                 notify_interval: float = ERROR_NOTIFY_INTERVAL,
+                 max_fingerprints: int = 500):
+        self.window = window
+        self.notify_interval = notify_interval
+        self.max_fingerprints = max_fingerprints
+        self._errors: Dict[str, ErrorStats] = {}
+        self.forward: Optional[Callable[[tuple], None]] = None
+    
+    def fingerprint(self, error: BaseException) -> tuple:
+        """(отпечаток, тип, место) - без номеров строк, чтобы не зависеть от правок"""
+        error_type = f"{type(error).__module__}.{type(error).__qualname__}"
+        frames = traceback.extract_tb(error.__traceback__)[-self.FRAMES:]
+        where = ' ← '.join(
+            f"{os.path.basename(frame.filename)}:{frame.name}"
+            for frame in reversed(frames)
+        )
+        digest = hashlib.sha1(f"{error_type}|{where}".encode()).hexdigest()[:8]
+        return digest, error_type.rsplit('.', 1)[-1], where or '?'
+    
+    def record(self, error: BaseException) -> Optional[Dict]:
+        """Учесть исключение.
+        
+        Возвращает данные для уведомления, если по этому отпечатку пора
+        уведомить администраторов, иначе None.
+        """
+        fingerprint, error_type, where = self.fingerprint(error)
+        entry = (fingerprint, error_type, where, str(error)[:500])
+        if self.forward is not None:
+            self.forward(entry)
+            return None
+        return self.add(*entry)
+    
+    def add(self, fingerprint: str, error_type: str, where: str,
+            message: str) -> Optional[Dict]:
+        """Учесть уже разобранную ошибку (в том числе от рабочего процесса)"""
+        now = time.time()
+        stats = self._errors.get(fingerprint)
+        if stats is None:
+            if len(self._errors) >= self.max_fingerprints:
+                stalest = min(self._errors.values(), key=lambda s: s.last_seen)
+                del self._errors[stalest.fingerprint]
+            stats = self._errors[fingerprint] = ErrorStats(fingerprint, error_type, where)
+            stats.first_seen = now
+        
+        minute = int(now // 60)
+        if stats.buckets and stats.buckets[-1][0] == minute:
+            stats.buckets[-1][1] += 1
+        else:
+            stats.buckets.append([minute, 1])
+        
+        stats.total += 1
+        stats.last_seen = now
+        stats.message = message
+        stats.suppressed += 1
+        
+        if now - stats.last_notified < self.notify_interval:
+            return None
+        
+        report = self._report(stats, now)
+        stats.last_notified = now
+        stats.suppressed = 0
+        return report
+    
+    def _report(self, stats: ErrorStats, now: float) -> Dict:
+        return {
+            'fingerprint': stats.fingerprint,
+            'type': stats.error_type,
+            'where': stats.where,
+            'message': stats.message,
+            'count': stats.suppressed,
+            'window_count': stats.window_count(now, self.window),
+            'total': stats.total
+        }
+    
+    def digest(self) -> List[Dict]:
+        """Ошибки, повторявшиеся после последнего уведомления; счётчики сбрасываются"""
+        now = time.time()
+        reports = []
+        for stats in self._errors.values():
+            if stats.suppressed:
+                reports.append(self._report(stats, now))
+                stats.last_notified = now
+                stats.suppressed = 0
+        return sorted(reports, key=lambda r: r['count'], reverse=True)
+    
+    def top(self, limit: int = 10) -> List[Dict]:
+        """Самые частые ошибки за окно"""
+        now = time.time()
+        reports = [self._report(stats, now) for stats in self._errors.values()]
+        reports = [r for r in reports if r['window_count']]
+        reports.sort(key=lambda r: r['window_count'], reverse=True)
+        return reports[:limit]
+
+error_tracker = ErrorTracker()
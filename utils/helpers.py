@@ -93,6 +93,29 @@ def paginate_list(items: List, page: int = 0, per_page: int = 10) -> tuple:
     
     return paginated_items, total_pages
 
+def parse_page(args: list) -> int:
+    """Номер страницы из аргументов маршрута (prefix или prefix_N)"""
+    return args[0] if args else 0
+
+def get_page_cursor(storage: Dict, key: str, page: int) -> tuple:
+    """Курсор начала страницы для keyset-пагинации.
+    
+    Курсоры пройденных страниц хранятся в storage (context.user_data).
+    Если курсор запрошенной страницы неизвестен, возвращаемся к первой.
+    Возвращает (page, cursor).
+    """
+    cursors = storage.setdefault('page_cursors', {}).setdefault(key, [None])
+    if page >= len(cursors):
+        return 0, None
+    return page, cursors[page]
+
+def save_page_cursor(storage: Dict, key: str, page: int, next_cursor) -> None:
+    """Запомнить курсор следующей страницы"""
+    cursors = storage.setdefault('page_cursors', {}).setdefault(key, [None])
+    del cursors[page + 1:]
+    if next_cursor is not None:
+        cursors.append(next_cursor)
+
 def generate_order_report(order: Dict) -> str:
     """Генерация отчета по заказу"""
     from config import ORDER_STATUSES
@@ -174,3 +197,16 @@ def create_progress_bar(current: int, total: int, length: int = 10) -> str:
     percentage = int((current / total) * 100)
     
     return f"{bar} {percentage}%"
+
+def create_sparkline(values: List[int], width: int = 30) -> str:
+    """Мини-график из значений; больше width значений складываются в width столбцов"""
+    if len(values) > width:
+        step = -(-len(values) // width)
+        values = [sum(values[i:i + step]) for i in range(0, len(values), step)]
+    
+    peak = max(values, default=0)
+    if peak == 0:
+        return '▁' * len(values)
+    
+    bars = '▁▂▃▄▅▆▇█'
+    return ''.join(bars[value * (len(bars) - 1) // peak] for value in values)
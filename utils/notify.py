@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from telegram import Bot, Message
+from telegram.error import RetryAfter
+
+from config import (
+    NOTIFY_GLOBAL_RATE, NOTIFY_CHAT_RATE, NOTIFY_CHAT_BURST, NOTIFY_MAX_RETRIES
+)
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Ограничитель частоты (GCRA): не более rate событий в секунду,
+    с допустимой пачкой из burst событий подряд"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self._tat = 0.0  # теоретическое время следующего события
+    
+    def reserve(self, now: float) -> float:
+        """Занять слот, вернуть момент, когда им можно воспользоваться"""
+        start = max(now, self._tat - self.tolerance)
+        self._tat = max(self._tat, start) + self.interval
+        return start
+    
+    async def acquire(self):
+        """Дождаться своего слота"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        delay = self.reserve(now) - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def pause(self, seconds: float):
+        """Приостановить выдачу слотов (например, после RetryAfter)"""
+        now = asyncio.get_running_loop().time()
+        self._tat = max(self._tat, now + seconds + self.tolerance)
+    
+    def idle(self, now: float) -> bool:
+        """Ограничитель в исходном состоянии и его можно забыть"""
+        return self._tat <= now
+
+class SendResult(NamedTuple):
+    """Итог отправки одному получателю"""
+    chat_id: int
+    message: Optional[Message] = None
+    error: Optional[Exception] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class Notifier:
+    """Отправка сообщений с учётом общего лимита бота и лимита на чат.
+    
+    RetryAfter обрабатывается прозрачно: отправка повторяется после
+    указанной паузы, остальные отправки на это время тоже ждут.
+    """
+    
+    # Сколько чатов держать, прежде чем чистить простаивающие ограничители
+    MAX_CHAT_LIMITERS = 10000
+    
+    def __init__(self, global_rate: float = NOTIFY_GLOBAL_RATE,
+                 chat_rate: float = NOTIFY_CHAT_RATE,
+                 chat_burst: int = NOTIFY_CHAT_BURST,
+                 max_retries: int = NOTIFY_MAX_RETRIES):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global = RateLimiter(global_rate)
+        self._chats: Dict[int, RateLimiter] = {}
+    
+    def _chat_limiter(self, chat_id: int) -> RateLimiter:
+        limiter = self._chats.get(chat_id)
+        if limiter is None:
+            if len(self._chats) >= self.MAX_CHAT_LIMITERS:
+                now = asyncio.get_running_loop().time()
+                self._chats = {
+                    cid: lim for cid, lim in self._chats.items() if not lim.idle(now)
+                }
+            limiter = self._chats[chat_id] = RateLimiter(self.chat_rate, self.chat_burst)
+        return limiter
+    
+    async def _call(self, chat_id: int, request) -> SendResult:
+        """Выполнить запрос к чату с учётом лимитов и повторов после RetryAfter"""
+        for attempt in range(self.max_retries + 1):
+            await self._chat_limiter(chat_id).acquire()
+            await self._global.acquire()
+            
+            try:
+                message = await request()
+                return SendResult(chat_id, message=message)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    return SendResult(chat_id, error=e)
+                logger.warning(
+                    f"Flood control при отправке в {chat_id}: ждём {e.retry_after} с"
+                )
+                self._global.pause(e.retry_after)
+            except Exception as e:
+                return SendResult(chat_id, error=e)
+    
+    async def send(self, bot: Bot, chat_id: int, text: str, **kwargs) -> SendResult:
+        """Отправить сообщение одному получателю; исключения не пробрасываются"""
+        return await self._call(
+            chat_id,
+            lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        )
+    
+    async def edit(self, bot: Bot, chat_id: int, message_id: int,
+                   text: str, **kwargs) -> SendResult:
+        """Отредактировать ранее отправленное сообщение"""
+        return await self._call(
+            chat_id,
+            lambda: bot.edit_message_text(
+                text=text, chat_id=chat_id, message_id=message_id, **kwargs
+            )
+        )
+    
+    async def send_many(self, bot: Bot, chat_ids: Iterable[int],
+                        text: str, **kwargs) -> List[SendResult]:
+        """Отправить одно сообщение всем получателям параллельно"""
+        return list(await asyncio.gather(*(
+            self.send(bot, chat_id, text, **kwargs) for chat_id in dict.fromkeys(chat_ids)
+        )))
+
+notifier = Notifier()
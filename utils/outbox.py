@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Iterable, List, Optional
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, ChatMigrated, Forbidden, InvalidToken
+
+from config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_DELAY,
+    OUTBOX_POLL_INTERVAL
+)
+from database import adb
+from utils.notify import notifier
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета: меньше - раньше
+PRIORITY_USER = 0  # ответы и уведомления клиентам
+PRIORITY_ADMIN = 1  # уведомления администраторам
+PRIORITY_BULK = 2  # массовые рассылки
+
+# Ошибки, после которых повторять отправку бессмысленно
+PERMANENT_ERRORS = (Forbidden, BadRequest, ChatMigrated, InvalidToken)
+
+class Outbox:
+    """Очередь исходящих сообщений в БД и фоновая отправка.
+    
+    Обработчики только ставят сообщения в очередь; отправляет их фоновая
+    задача - пачками, по приоритету, с повторами и растущей паузой.
+    """
+    
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Рабочие процессы сами не отправляют: вместо этого будят супервизор
+        self.on_enqueue: Optional[Callable[[], None]] = None
+    
+    @staticmethod
+    def _dump_options(options: dict) -> Optional[str]:
+        """Параметры send_message в JSON (клавиатура - через to_dict)"""
+        if not options:
+            return None
+        markup = options.get('reply_markup')
+        if markup is not None:
+            options = dict(options, reply_markup=markup.to_dict())
+        return json.dumps(options, ensure_ascii=False)
+    
+    @staticmethod
+    def _load_options(options: Optional[str], bot: Bot) -> dict:
+        if not options:
+            return {}
+        options = json.loads(options)
+        if 'reply_markup' in options:
+            options['reply_markup'] = InlineKeyboardMarkup.de_json(options['reply_markup'], bot)
+        return options
+    
+    async def send(self, chat_id: int, text: str,
+                   priority: int = PRIORITY_USER, **options) -> int:
+        """Поставить сообщение в очередь, вернуть его id в outbox"""
+        ids = await self.send_many([chat_id], text, priority, **options)
+        return ids[0]
+    
+    async def send_many(self, chat_ids: Iterable[int], text: str,
+                        priority: int = PRIORITY_USER, **options) -> List[int]:
+        """Поставить одно сообщение в очередь для нескольких получателей"""
+        dumped = self._dump_options(options)
+        ids = await adb.enqueue_messages([
+            (chat_id, text, dumped, priority) for chat_id in dict.fromkeys(chat_ids)
+        ])
+        self.wake()
+        return ids
+    
+    async def revise(self, outbox_ids: List[int], text: str,
+                     priority: int = PRIORITY_USER, **options) -> List[int]:
+        """Заменить текст ранее поставленного в очередь сообщения.
+        
+        Ещё не отправленные меняются прямо в очереди, отправленные -
+        редактируются, остальным (в процессе отправки или не доставленным)
+        уходит новое сообщение. Возвращает актуальные id записей outbox.
+        """
+        dumped = self._dump_options(options)
+        rows = await adb.revise_outbox(outbox_ids, text, dumped)
+        
+        current = [row['id'] for row in rows if row['status'] == 'pending']
+        resend = [
+            (row['chat_id'], text, dumped, priority,
+             row['message_id'] if row['status'] == 'sent' else None)
+            for row in rows if row['status'] != 'pending'
+        ]
+        if resend:
+            current += await adb.enqueue_messages(resend)
+            self.wake()
+        return current
+    
+    def wake(self):
+        """В очереди появились сообщения - не ждать следующего опроса"""
+        self._wakeup.set()
+        if self.on_enqueue is not None:
+            self.on_enqueue()
+    
+    def start(self, bot: Bot, recover: bool = True):
+        """Запустить фоновую отправку (в post_init)
+        
+        recover=False - не разбирать прерванные отправки (супервизор
+        многопроцессного режима делает это сам до запуска рабочих процессов).
+        """
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(bot, recover), name='outbox')
+    
+    async def recover(self):
+        """Пометить прерванные остановкой отправки (повторно не отправляются)"""
+        interrupted = await adb.recover_outbox()
+        if interrupted:
+            logger.warning(
+                f"Outbox: {interrupted} сообщ. прервано при остановке, повторно не отправляются"
+            )
+    
+    async def stop(self):
+        """Дождаться текущей пачки и остановить отправку"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+    
+    async def _run(self, bot: Bot, recover: bool):
+        if recover:
+            await self.recover()
+        
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                batch = await adb.claim_outbox(OUTBOX_BATCH_SIZE)
+                if batch:
+                    await self._deliver(bot, batch)
+                    continue
+                
+                timeout = OUTBOX_POLL_INTERVAL
+                due = await adb.next_outbox_due()
+                if due is not None:
+                    timeout = min(timeout, max(0.0, due - time.time()))
+            except Exception as e:
+                logger.error(f"Outbox: ошибка обработки очереди: {e}", exc_info=True)
+                timeout = OUTBOX_POLL_INTERVAL
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _deliver(self, bot: Bot, batch: List[dict]):
+        """Отправить пачку параллельно и записать итоги одной транзакцией"""
+        results = await asyncio.gather(*(
+            notifier.edit(
+                bot, item['chat_id'], item['edit_message_id'], item['text'],
+                **self._load_options(item['options'], bot)
+            ) if item['edit_message_id'] else
+            notifier.send(
+                bot, item['chat_id'], item['text'],
+                **self._load_options(item['options'], bot)
+            )
+            for item in batch
+        ))
+        
+        sent, retry, failed = [], [], []
+        for item, result in zip(batch, results):
+            event = {'p': item['priority'], 'n': item['attempts'], 'ok': int(result.ok)}
+            if not result.ok:
+                event['e'] = type(result.error).__name__
+            await adb.record_event('delivery', event)
+            if result.ok:
+                # При правке сообщение остаётся тем же
+                message_id = item['edit_message_id'] or result.message.message_id
+                sent.append((message_id, item['id']))
+                continue
+            
+            error = f"{type(result.error).__name__}: {result.error}"
+            if isinstance(result.error, PERMANENT_ERRORS) or item['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+                logger.error(f"Outbox: сообщение {item['id']} для {item['chat_id']} не доставлено: {error}")
+                failed.append((error, item['id']))
+            else:
+                delay = OUTBOX_RETRY_DELAY * 2 ** (item['attempts'] - 1)
+                retry.append((time.time() + delay, error, item['id']))
+        
+        await adb.complete_outbox(sent, retry, failed)
+
+outbox = Outbox()
@@ -0,0 +1,50 @@
+import functools
+from typing import Any, Callable, Dict
+
+class RenderCache:
+    """Готовые тексты и клавиатуры экранов, зависящих только от config.py.
+    
+    Экран собирается при первом обращении (или при прогреве на старте) и
+    дальше отдаётся по ссылке: строки неизменяемы, а InlineKeyboardMarkup
+    в PTB 20 заморожен после создания, так что общий объект безопасен.
+    Вариант экрана - это аргументы функции (например, main_menu(is_admin)).
+    
+    Кэш статичен на время жизни процесса: config.py читается один раз при
+    импорте, поэтому изменения тарифов и текстов вступают в силу после
+    перезапуска бота - вместе с пересборкой экранов.
+    """
+    
+    def __init__(self):
+        self._items: Dict[tuple, Any] = {}
+        self.hits = 0
+        self.builds = 0
+    
+    def cached(self, func: Callable) -> Callable:
+        """Декоратор: результат func(*args) строится один раз на вариант"""
+        name = func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items()))) if kwargs else (name, args)
+            try:
+                value = self._items[key]
+            except KeyError:
+                value = self._items[key] = func(*args, **kwargs)
+                self.builds += 1
+                return value
+            self.hits += 1
+            return value
+        
+        return wrapper
+    
+    def clear(self):
+        self._items.clear()
+    
+    def stats(self) -> Dict:
+        return {
+            'screens': len(self._items),
+            'hits': self.hits,
+            'builds': self.builds
+        }
+
+render_cache = RenderCache()
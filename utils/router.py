@@ -0,0 +1,105 @@
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import BaseHandler
+
+class Route(NamedTuple):
+    """Обработчик действия и типы его аргументов"""
+    action: str
+    callback: Callable
+    arg_types: Tuple[type, ...]
+    optional: int
+
+class _Node:
+    __slots__ = ('children', 'route')
+    
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.route: Optional[Route] = None
+
+class CallbackRouter(BaseHandler):
+    """Один обработчик callback-кнопок вместо списка CallbackQueryHandler.
+    
+    callback_data вида action_arg1_arg2 разбирается по '_' один раз:
+    действие ищется в дереве по словам (самое длинное совпадение, поэтому
+    admin_order_5 и admin_orders_2 не путаются), остаток приводится к
+    типам аргументов и передаётся обработчику в context.args. Лишние слова
+    склеиваются в последний аргумент (setstatus_5_in_progress, tariff_bot_simple).
+    
+    Время разбора зависит от длины callback_data, а не от числа маршрутов.
+    
+    on_route - общий для всех роутеров (в том числе в диалогах) вызов
+    on_route(update, route) перед обработчиком найденного маршрута: через
+    него нажатия кнопок попадают в аналитику без повторного разбора.
+    """
+    
+    on_route: Optional[Callable[[Update, Route], Awaitable]] = None
+    
+    def __init__(self, block: bool = True):
+        super().__init__(self._not_routed, block=block)
+        self._root = _Node()
+    
+    def add(self, action: str, callback: Callable, *arg_types: type, optional: int = 0):
+        """Зарегистрировать действие; optional - сколько последних аргументов можно опустить"""
+        node = self._root
+        for word in action.split('_'):
+            node = node.children.setdefault(word, _Node())
+        
+        if node.route is not None:
+            raise ValueError(f"Маршрут {action} уже зарегистрирован")
+        node.route = Route(action, callback, arg_types, optional)
+        return self
+    
+    def resolve(self, data: str) -> Optional[Tuple[Route, List]]:
+        """(маршрут, аргументы) для callback_data или None"""
+        words = data.split('_')
+        node = self._root
+        found, found_at = None, 0
+        
+        for index, word in enumerate(words):
+            node = node.children.get(word)
+            if node is None:
+                break
+            if node.route is not None:
+                found, found_at = node.route, index + 1
+        
+        if found is None:
+            return None
+        
+        rest = words[found_at:]
+        types = found.arg_types
+        if len(rest) > len(types):
+            if not types:
+                return None
+            rest[len(types) - 1:] = ['_'.join(rest[len(types) - 1:])]
+        elif len(rest) < len(types) - found.optional:
+            return None
+        
+        try:
+            args = [arg_type(value) for arg_type, value in zip(types, rest)]
+        except ValueError:
+            return None
+        return found, args
+    
+    def check_update(self, update: object):
+        if not isinstance(update, Update) or update.callback_query is None:
+            return None
+        data = update.callback_query.data
+        if not isinstance(data, str):
+            return None
+        return self.resolve(data)
+    
+    def collect_additional_context(self, context, update, application, check_result):
+        context.args = check_result[1]
+    
+    async def handle_update(self, update, application, check_result, context):
+        self.collect_additional_context(context, update, application, check_result)
+        route = check_result[0]
+        if CallbackRouter.on_route is not None:
+            await CallbackRouter.on_route(update, route)
+        return await route.callback(update, context)
+    
+    @staticmethod
+    async def _not_routed(update, context):
+        # Вызывается только через handle_update с найденным маршрутом
+        return None
@@ -0,0 +1,256 @@
+"""Многопроцессный режим: супервизор и рабочие процессы.
+
+Супервизор получает обновления (polling или webhook, как и обычный запуск)
+и раздаёт их N рабочим процессам по user id. Обновления одного пользователя
+всегда попадают в один процесс и обрабатываются там по порядку, поэтому
+состояния ConversationHandler остаются корректными.
+
+Все процессы работают с одной базой SQLite в режиме WAL; записи между
+процессами сериализуются самой SQLite (BEGIN IMMEDIATE + busy_timeout).
+Кэш заказов в рабочих процессах отключён: заказ меняют и клиент, и
+администратор, а они могут обслуживаться разными процессами. Список
+администраторов кэшируется в каждом процессе на ADMIN_CACHE_TTL.
+
+Ошибки рабочие процессы пересылают супервизору: уведомления, сводку и
+/errors он ведёт по всем процессам сразу, как и обслуживание БД
+(bot.schedule_maintenance).
+
+Лимит отправки Bot API (~30 сообщ./с на бота) общий для всех процессов,
+поэтому всё, что идёт через utils.notify.notifier, отправляет только
+супервизор: очередь outbox (рабочие процессы лишь ставят в неё сообщения
+и будят супервизор) и рассылки, которые берут из тех же NOTIFY_GLOBAL_RATE
+не более BROADCAST_RATE. Напрямую рабочие процессы отвечают только на
+действия пользователей - как и в обычном запуске.
+
+Рабочий процесс, завершившийся аварийно, супервизор перезапускает при
+следующем обновлении для него. Обновления, которые процесс уже забрал из
+очереди, при этом теряются, как и очередь процесса, не остановившегося за
+отведённое время в Supervisor.stop.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+from typing import Callable, List, Optional
+
+from telegram import Update
+from telegram.ext import Application, CommandHandler, TypeHandler
+
+from config import BOT_TOKEN
+
+logger = logging.getLogger(__name__)
+
+def shard_for(update: Update, workers: int) -> int:
+    """Номер рабочего процесса для обновления"""
+    if update.effective_user:
+        key = update.effective_user.id
+    elif update.effective_chat:
+        key = update.effective_chat.id
+    else:
+        key = 0
+    return key % workers
+
+# ============= РАБОЧИЙ ПРОЦЕСС =============
+
+def worker_main(index: int, updates: multiprocessing.Queue,
+                bot_factory: Optional[Callable] = None, ready=None, signals=None):
+    """Точка входа рабочего процесса.
+    
+    bot_factory - функция без аргументов, создающая бота (для заглушек);
+    ready - Event, который выставляется, когда процесс готов принимать обновления;
+    signals - очередь к супервизору: ('error', запись) и ('outbox',).
+    """
+    # Останавливает рабочих супервизор, а не Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker_loop(index, updates, bot_factory, ready, signals))
+
+async def _worker_loop(index, updates, bot_factory, ready, signals):
+    from bot import build_application
+    from utils.errors import error_tracker
+    from utils.outbox import outbox
+    
+    if signals is not None:
+        error_tracker.forward = lambda entry: signals.put(('error', entry))
+        outbox.on_enqueue = lambda: signals.put(('outbox',))
+    
+    application = build_application(
+        bot=bot_factory() if bot_factory else None,
+        primary=False
+    )
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    logger.info(f"Рабочий процесс {index} запущен (pid {os.getpid()})")
+    if ready is not None:
+        ready.set()
+    
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            data = await loop.run_in_executor(None, updates.get)
+            if data is None:
+                break
+            update = Update.de_json(json.loads(data), application.bot)
+            await application.update_queue.put(update)
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await application.post_shutdown(application)
+        logger.info(f"Рабочий процесс {index} остановлен")
+
+# ============= СУПЕРВИЗОР =============
+
+class Supervisor:
+    """Запуск рабочих процессов и раздача им обновлений"""
+    
+    def __init__(self, workers: int, bot_factory: Optional[Callable] = None):
+        self.workers = workers
+        self.bot_factory = bot_factory
+        # spawn: дочерние процессы не наследуют открытые соединения SQLite
+        self._context = multiprocessing.get_context('spawn')
+        self._queues: List[multiprocessing.Queue] = []
+        self._processes: List[multiprocessing.Process] = []
+        # Сообщения рабочих процессов: ('error', (отпечаток, тип, место, текст))
+        # и ('outbox',) - в очереди outbox появились сообщения
+        self.signals = self._context.Queue()
+    
+    def _spawn(self, index: int, updates: multiprocessing.Queue, ready=None):
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, updates, self.bot_factory, ready, self.signals),
+            name=f'bot-worker-{index}'
+        )
+        process.start()
+        return process
+    
+    def start(self, wait_ready: bool = True):
+        """Запустить рабочие процессы"""
+        # Кэш заказов в рабочих процессах не держим (см. описание модуля)
+        os.environ['ORDER_CACHE_SIZE'] = '0'
+        
+        events = []
+        for index in range(self.workers):
+            updates, ready = self._context.Queue(), self._context.Event()
+            process = self._spawn(index, updates, ready)
+            self._queues.append(updates)
+            self._processes.append(process)
+            events.append(ready)
+        
+        if wait_ready:
+            for ready in events:
+                ready.wait()
+    
+    def _ensure_alive(self, shard: int):
+        """Перезапустить рабочий процесс, если он завершился аварийно"""
+        process = self._processes[shard]
+        if process.is_alive():
+            return
+        
+        logger.error(
+            f"{process.name} завершился (код {process.exitcode}), перезапускаем; "
+            f"обновления, которые он успел забрать, потеряны"
+        )
+        # Очередь упавшего процесса могла остаться заблокированной им -
+        # переносим из неё что удастся в новую
+        old, updates = self._queues[shard], self._context.Queue()
+        while True:
+            try:
+                updates.put(old.get_nowait())
+            except (queue.Empty, OSError, ValueError):
+                break
+        self._queues[shard] = updates
+        self._processes[shard] = self._spawn(shard, updates)
+    
+    def dispatch(self, update: Update):
+        """Передать обновление процессу его пользователя"""
+        self.dispatch_raw(shard_for(update, self.workers), update.to_json())
+    
+    def dispatch_raw(self, shard: int, data: str):
+        """Передать уже сериализованное обновление"""
+        self._ensure_alive(shard)
+        self._queues[shard].put(data)
+    
+    def stop(self, timeout: float = 30):
+        """Дождаться обработки очередей и остановить процессы"""
+        for updates in self._queues:
+            updates.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} не остановился, завершаем принудительно")
+                process.terminate()
+        self._queues.clear()
+        self._processes.clear()
+
+def run_supervisor(workers: int):
+    """Запуск бота в многопроцессном режиме"""
+    from bot import (
+        run_application, notify_started, notify_error,
+        schedule_maintenance, errors_command
+    )
+    from database import adb
+    from utils.errors import error_tracker
+    from utils.outbox import outbox
+    from utils.broadcast import broadcaster
+    
+    supervisor = Supervisor(workers)
+    collector = None
+    
+    async def route(update: Update, context):
+        supervisor.dispatch(update)
+    
+    async def collect_signals(bot):
+        """Ошибки рабочих процессов - в общий error_tracker, outbox - будим"""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, supervisor.signals.get)
+            if message is None:
+                break
+            if message[0] == 'outbox':
+                outbox.wake()
+                continue
+            try:
+                report = error_tracker.add(*message[1])
+                if report:
+                    await notify_error(bot, report)
+            except Exception as e:
+                logger.error(f"Ошибка уведомления об ошибке рабочего процесса: {e}")
+    
+    async def post_init(application):
+        nonlocal collector
+        # Прерванные отправки разбираем до запуска рабочих процессов
+        await outbox.recover()
+        supervisor.start()
+        collector = asyncio.create_task(collect_signals(application.bot))
+        # Очередь outbox отправляет только супервизор (см. описание модуля)
+        outbox.start(application.bot, recover=False)
+        logger.info(f"🧩 Запущено рабочих процессов: {workers}")
+        # Прерванные рассылки продолжает супервизор
+        await broadcaster.resume(application.bot)
+        await notify_started(application)
+    
+    async def post_shutdown(application):
+        await broadcaster.stop()
+        await asyncio.get_running_loop().run_in_executor(None, supervisor.stop)
+        supervisor.signals.put(None)
+        if collector is not None:
+            await collector
+        await outbox.stop()
+        adb.close()
+    
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    # /errors показывает статистику супервизора - рабочим не передаём
+    application.add_handler(CommandHandler('errors', errors_command))
+    application.add_handler(TypeHandler(Update, route))
+    schedule_maintenance(application)
+    
+    run_application(application)